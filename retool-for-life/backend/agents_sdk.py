@@ -76,8 +76,20 @@ class WellnessAgentSDK:
         - Phone number: {self.user_profile.get('phone', os.getenv('DEMO_PHONE_NUMBER'))}
         """
     
-    async def process_message(self, user_message: str, capture_traces: bool = False) -> Dict[str, Any]:
-        """Process a user message and return agent response with optional tracing"""
+    async def process_message(
+        self,
+        user_message: str,
+        capture_traces: bool = False,
+        stream_cb: Optional[Callable[[str, Optional[str]], bool]] = None
+    ) -> Dict[str, Any]:
+        """Process a user message and return agent response with optional tracing
+        
+        When ``stream_cb`` is given the run is streamed and the callback is
+        invoked as ``stream_cb(text_delta, tool_name)`` for every text delta or
+        tool call; returning True cancels the rest of the generation.
+        """
+        if stream_cb is not None:
+            return await self._process_streamed(user_message, capture_traces, stream_cb)
         try:
             # Configure tracing
             config = RunConfig(
@@ -125,6 +137,68 @@ class WellnessAgentSDK:
                 "tools_used": []
             }
     
+    async def _process_streamed(
+        self,
+        user_message: str,
+        capture_traces: bool,
+        stream_cb: Callable[[str, Optional[str]], bool]
+    ) -> Dict[str, Any]:
+        """Stream a run, stopping early once ``stream_cb`` is satisfied"""
+        try:
+            config = RunConfig(
+                tracing_disabled=not capture_traces,
+                trace_include_sensitive_data=True
+            )
+            trace_id = f"trace_{int(datetime.now().timestamp() * 1000000)}"
+            
+            chunks: List[str] = []
+            tool_calls: List[Dict[str, Any]] = []
+            stopped = False
+            with trace(f"Agent evaluation: {self.name}", trace_id=trace_id) as current_trace:
+                result = Runner.run_streamed(self.agent, user_message, run_config=config)
+                async for event in result.stream_events():
+                    if event.type == "raw_response_event":
+                        if getattr(event.data, "type", None) != "response.output_text.delta":
+                            continue
+                        chunks.append(event.data.delta)
+                        done = stream_cb(event.data.delta, None)
+                    elif event.type == "run_item_stream_event" and event.item.type == "tool_call_item":
+                        tool_name = event.item.tool_name or "unknown"
+                        tool_calls.append({"tool_name": tool_name})
+                        done = stream_cb("", tool_name)
+                    else:
+                        continue
+                    if done:
+                        stopped = True
+                        result.cancel()
+                        break
+            
+            message = "".join(chunks) if stopped or result.final_output is None else str(result.final_output)
+            trace_data = None
+            if capture_traces and current_trace:
+                trace_data = self._extract_comprehensive_trace_data(current_trace, result)
+            
+            return {
+                "message": message,
+                "tool_calls": tool_calls,
+                "success": True,
+                "trace_data": trace_data,
+                "reasoning": message[:500],
+                "tools_used": list(dict.fromkeys(tc["tool_name"] for tc in tool_calls)),
+                "stopped_early": stopped
+            }
+        except Exception as e:
+            logger.error(f"Error processing message: {str(e)}")
+            return {
+                "message": "I encountered an error processing your request. Please try again.",
+                "tool_calls": [],
+                "success": False,
+                "error": str(e),
+                "trace_data": None,
+                "reasoning": f"Error occurred: {str(e)}",
+                "tools_used": []
+            }
+    
     def _extract_comprehensive_trace_data(self, trace_obj: Any, result: Any) -> Dict[str, Any]:
         """Extract comprehensive trace data from OpenAI SDK trace object"""
         try:
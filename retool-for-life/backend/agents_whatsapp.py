@@ -1,39 +1,25 @@
 import os
 import json
 import asyncio
+import functools
+import random
 import time
 import logging
-import requests  # For TextBelt SMS
+from datetime import datetime, timedelta
+import aiohttp  # For TextBelt SMS
+from aiohttp_retry import ExponentialRetry, RetryClient
+import orjson
+from typing import List
+
+from dotenv import load_dotenv
+from agents import Agent, function_tool, Runner
+from twilio.rest import Client as TwilioClient
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    import subprocess, sys
-    subprocess.run([sys.executable, "-m", "pip", "install", "python-dotenv"], check=True)
-    from dotenv import load_dotenv
-    load_dotenv()
-
-# Import from openai-agents SDK
-try:
-    from openai_agents import Agent, function_tool, Runner
-except ImportError:
-    try:
-        # Try alternative import path
-        from agents import Agent, function_tool, Runner
-    except ImportError:
-        import subprocess, sys
-        subprocess.run([sys.executable, "-m", "pip", "install", "openai-agents"], check=True)
-        from openai_agents import Agent, function_tool, Runner
-
-# Install Twilio SDK if missing
-try:
-    from twilio.rest import Client as TwilioClient
-except ImportError:
-    import subprocess, sys
-    subprocess.run([sys.executable, "-m", "pip", "install", "twilio"], check=True)
-    from twilio.rest import Client as TwilioClient
+load_dotenv()
 
 # (Optional) If running in a Jupyter/Colab environment, enable async event loop nesting
 # Disabled for FastAPI/uvloop compatibility
@@ -63,8 +49,13 @@ TWILIO_AUTH_TOKEN     = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_FROM  = os.getenv("TWILIO_WHATSAPP_FROM")   # e.g. "whatsapp:+14155238886"
 HUMAN_WHATSAPP_NUMBER = os.getenv("HUMAN_WHATSAPP_NUMBER")  # e.g. "+12675744122" or "whatsapp:+12675744122"
 OPENAI_API_KEY        = os.getenv("OPENAI_API_KEY")
+TWILIO_POOL_SIZE      = 4
+MAX_CONCURRENT_SENDS  = int(os.getenv("MAX_CONCURRENT_SENDS", "3"))
+OUTBOX_WORKERS        = 3
 
-# TextBelt configuration
+# TextBelt configuration ("textbelt" is the free one-SMS-per-day key)
+TEXTBELT_URL     = "https://textbelt.com/text"
+TEXTBELT_API_KEY = os.getenv("TEXTBELT_API_KEY", "textbelt")
 
 missing = [
     name for name, val in [
@@ -89,8 +80,45 @@ SMS_PHONE_NUMBER = HUMAN_WHATSAPP_NUMBER.replace("whatsapp:", "")
 
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
-# Initialize Twilio client
-twilio_client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# Initialize Twilio client on one pooled HTTP session. Sends run in executor
+# threads, so size the pool for a few of them sharing kept-alive connections.
+twilio_http_client = TwilioHttpClient(timeout=10)
+twilio_http_client.session.mount(
+    "https://", HTTPAdapter(pool_connections=1, pool_maxsize=TWILIO_POOL_SIZE)
+)
+twilio_client = TwilioClient(
+    TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=twilio_http_client
+)
+
+# Every WhatsApp send goes from the same sender to the same recipient, so
+# bind those (and the message list lookup) once
+_create_whatsapp_message = functools.partial(
+    twilio_client.messages.create,
+    from_=TWILIO_WHATSAPP_FROM,
+    to=HUMAN_WHATSAPP_NUMBER
+)
+
+# Shared HTTP session for TextBelt and the retrying client wrapped around
+# it, created lazily inside the running loop
+_http_session = None
+_textbelt_client = None
+
+# Caps in-flight Twilio and TextBelt requests across concurrent actions;
+# created lazily for the loop that uses it
+_send_sem = None
+_send_sem_loop = None
+
+# TextBelt POSTs get up to two retries with backoff on failed connects and
+# 429s only. Sending an SMS is not idempotent: after a read timeout or a 5xx
+# TextBelt may already have accepted the message, so those are not retried.
+_TEXTBELT_RETRY = ExponentialRetry(
+    attempts=3,
+    start_timeout=0.5,
+    statuses={429},
+    retry_all_server_errors=False,
+    exceptions={aiohttp.ClientConnectorError},
+    methods={"POST"}
+)
 
 SLEEP_DATA_PATH = "sleep_data.json"
 if not os.path.isfile(SLEEP_DATA_PATH):
@@ -98,96 +126,209 @@ if not os.path.isfile(SLEEP_DATA_PATH):
         "last_night": {"duration_hours": 5, "quality": "light—woke up 3 times"},
         "goal":       {"target_hours": 8, "advice": "Wind down 30 minutes before bed; avoid screens after 10 PM."}
     }
-    with open(SLEEP_DATA_PATH, "w") as f:
-        json.dump(sample_sleep, f, indent=2)
+    # Write to a temp file and rename it into place, so a concurrent reader
+    # never sees a partial file; racing writers produce identical contents
+    tmp_path = f"{SLEEP_DATA_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(sample_sleep, option=orjson.OPT_INDENT_2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, SLEEP_DATA_PATH)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # PLAIN HELPER FUNCTIONS (Called directly at 7:30 PM & 10 PM)
 # ──────────────────────────────────────────────────────────────────────────────
 
-def send_whatsapp_text(message: str) -> str:
+async def send_whatsapp_text(message: str) -> str:
     """
-    Sends a WhatsApp message via Twilio, retrying up to 3 times if there is an error.
+    Sends a WhatsApp message via Twilio, retrying up to 3 times with exponential
+    backoff on transient errors (network failures, 429s and 5xx responses).
     Returns a summary string.
     """
     max_attempts = 3
+    loop = asyncio.get_running_loop()
     for attempt in range(1, max_attempts + 1):
         try:
-            msg = twilio_client.messages.create(
-                body=message,
-                from_=TWILIO_WHATSAPP_FROM,
-                to=HUMAN_WHATSAPP_NUMBER
-            )
-            logging.info(f"Twilio WhatsApp SID {msg.sid} (status={msg.status})")
+            # The Twilio SDK is blocking, so keep it off the event loop
+            async with _get_send_sem():
+                msg = await loop.run_in_executor(
+                    None, functools.partial(_create_whatsapp_message, body=message)
+                )
+            logging.info("Twilio WhatsApp SID %s (status=%s)", msg.sid, msg.status)
             return f"Sent WhatsApp (SID: {msg.sid}, status: {msg.status})"
+        except TwilioRestException as e:
+            logging.warning("Attempt %s → Twilio error %s/%s: %s", attempt, e.status, e.code, e.msg)
+            # Auth and validation errors will fail the same way on every attempt
+            if e.status != 429 and e.status < 500:
+                return f"Error sending WhatsApp: {e.msg}"
         except Exception as e:
-            logging.warning(f"Attempt {attempt} → Twilio error: {e}")
-            time.sleep(2)
+            logging.warning("Attempt %s → Twilio error: %s", attempt, e)
+        if attempt < max_attempts:
+            await asyncio.sleep(0.5 * 2 ** (attempt - 1) + random.random() * 0.1)
     return "Error sending WhatsApp: exceeded retry attempts"
 
 
-def send_textbelt_sms(message: str) -> str:
+def _get_send_sem() -> asyncio.Semaphore:
+    """Return the send semaphore for the running loop, creating it on first use"""
+    global _send_sem, _send_sem_loop
+    loop = asyncio.get_running_loop()
+    if _send_sem is None or _send_sem_loop is not loop:
+        _send_sem = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        _send_sem_loop = loop
+    return _send_sem
+
+
+async def _acquire_send_slot(session, ctx, params) -> None:
+    """Take a send permit as a TextBelt request attempt starts"""
+    ctx.send_sem = _get_send_sem()
+    await ctx.send_sem.acquire()
+
+
+async def _release_send_slot(session, ctx, params) -> None:
+    """Return the permit once the attempt ends, before any retry backoff"""
+    send_sem = getattr(ctx, "send_sem", None)
+    if send_sem is not None:
+        ctx.send_sem = None
+        send_sem.release()
+
+
+# Holds a send permit for each attempt rather than across the retry loop,
+# so a throttled send does not keep a slot through its backoff
+_SEND_SLOT_TRACE = aiohttp.TraceConfig()
+_SEND_SLOT_TRACE.on_request_start.append(_acquire_send_slot)
+_SEND_SLOT_TRACE.on_request_end.append(_release_send_slot)
+_SEND_SLOT_TRACE.on_request_exception.append(_release_send_slot)
+
+
+async def _get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use"""
+    global _http_session, _textbelt_client
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            trace_configs=[_SEND_SLOT_TRACE]
+        )
+        # The retry wrapper borrows the shared session; it owns no connections
+        _textbelt_client = RetryClient(client_session=_http_session, retry_options=_TEXTBELT_RETRY)
+    return _http_session
+
+
+async def close_clients() -> None:
+    """Flush the outbox, then close the shared aiohttp session and the
+    Twilio connection pool"""
+    global _http_session, _textbelt_client, _outbox, _send_sem
+    await drain_outbox()
+    for worker in _outbox_workers:
+        worker.cancel()
+    _outbox_workers.clear()
+    _outbox = None
+    _send_sem = None
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+        _textbelt_client = None
+    twilio_http_client.session.close()
+
+
+async def send_textbelt_sms(message: str) -> str:
     """
     Sends an SMS via TextBelt API.
     Returns a summary string.
     """
     try:
-        response = requests.post('https://textbelt.com/text', {
+        await _get_http_session()
+        async with _textbelt_client.post(TEXTBELT_URL, data={
             'phone': SMS_PHONE_NUMBER,
             'message': message,
             'key': TEXTBELT_API_KEY,
-        })
-        result = response.json()
+        }) as response:
+            # TextBelt answers with JSON but not always the JSON content type
+            result = await response.json(content_type=None)
         
         if result.get('success'):
-            logging.info(f"TextBelt SMS sent successfully: {result}")
+            logging.info("TextBelt SMS sent successfully: %s", result)
             return f"Sent SMS via TextBelt (success: {result.get('success')})"
         else:
             error_msg = result.get('error', 'Unknown error')
-            logging.error(f"TextBelt SMS failed: {error_msg}")
+            logging.error("TextBelt SMS failed: %s", error_msg)
             return f"Error sending SMS: {error_msg}"
     except Exception as e:
-        logging.error(f"TextBelt SMS exception: {e}")
+        logging.error("TextBelt SMS exception: %s", e)
         return f"Error sending SMS: {e}"
 
 
+# Background outbox for notifications nobody waits on: (label, sender,
+# message) items drained by OUTBOX_WORKERS tasks in the loop that created it
+_outbox = None
+_outbox_loop = None
+_outbox_workers: List[asyncio.Task] = []
+
+
+async def _outbox_worker(queue: asyncio.Queue) -> None:
+    """Send queued notifications one at a time, logging each outcome"""
+    while True:
+        label, sender, message = await queue.get()
+        try:
+            # Senders retry transient failures themselves
+            result = await sender(message)
+            logging.info("%s → %s", label, result)
+        except Exception as e:
+            logging.error("%s failed: %s", label, e)
+        finally:
+            queue.task_done()
+
+
+def _enqueue_send(label: str, sender, message: str) -> str:
+    """Queue a send for the background workers and return immediately"""
+    global _outbox, _outbox_loop
+    loop = asyncio.get_running_loop()
+    if _outbox is None or _outbox_loop is not loop:
+        _outbox = asyncio.Queue()
+        _outbox_loop = loop
+        _outbox_workers[:] = [
+            loop.create_task(_outbox_worker(_outbox)) for _ in range(OUTBOX_WORKERS)
+        ]
+    _outbox.put_nowait((label, sender, message))
+    return f"Queued {label}"
+
+
+async def drain_outbox() -> None:
+    """Wait until every queued notification has been sent"""
+    if _outbox is not None and _outbox_loop is asyncio.get_running_loop():
+        await _outbox.join()
+
+
 def start_screentime_limit_action() -> str:
     """
-    Sends a WhatsApp notification that screentime limits activate at 10 PM.
+    Queues a WhatsApp notification that screentime limits activate at 10 PM.
     """
     message = "Heads‐up: At 10 PM tonight, screentime limits on Reddit and X will activate."
-    result = send_whatsapp_text(message)
-    logging.info(f"start_screentime_limit_action → {result}")
-    return result
+    return _enqueue_send("start_screentime_limit_action", send_whatsapp_text, message)
 
 
 def activate_screentime_action() -> str:
     """
-    Sends a WhatsApp notification that screentime is now ON.
+    Queues a WhatsApp notification that screentime is now ON.
     """
     message = "Screentime is now ON. Your distracting apps have been limited."
-    result = send_whatsapp_text(message)
-    logging.info(f"activate_screentime_action → {result}")
-    return result
+    return _enqueue_send("activate_screentime_action", send_whatsapp_text, message)
 
 
-def run_shortcut_action() -> str:
+async def run_shortcut_action() -> str:
     """
     Simulates the shortcut that turns off distracting apps and dims brightness.
     """
     result = "Shortcut executed: distracting apps turned off, brightness dimmed."
-    logging.info(f"run_shortcut_action → {result}")
+    logging.info("run_shortcut_action → %s", result)
     return result
 
 
 def send_sleep_mode_sms() -> str:
     """
-    Sends "SLEEP_MODE_ON" SMS via TextBelt at 10 PM.
+    Queues the "SLEEP_MODE_ON" SMS via TextBelt at 10 PM.
     """
-    result = send_textbelt_sms("SLEEP_MODE_ON")
-    logging.info(f"send_sleep_mode_sms → {result}")
-    return result
+    return _enqueue_send("send_sleep_mode_sms", send_textbelt_sms, "SLEEP_MODE_ON")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -203,10 +344,10 @@ def get_sleep_data(user_id: str) -> dict:
     try:
         # Try to load from sleep_data.json if available
         try:
-            with open("sleep_data.json", "r") as f:
+            with open(SLEEP_DATA_PATH, "r", encoding="utf-8") as f:
                 data = json.load(f)
                 if user_id in data:
-                    logging.info(f"get_sleep_data → {data[user_id]}")
+                    logging.info("get_sleep_data → %s", data[user_id])
                     return data[user_id]
         except FileNotFoundError:
             pass
@@ -228,30 +369,30 @@ def get_sleep_data(user_id: str) -> dict:
                 "Consider meditation before bed"
             ]
         }
-        logging.info(f"get_sleep_data → {mock_data}")
+        logging.info("get_sleep_data → %s", mock_data)
         return mock_data
     except Exception as e:
-        logging.error(f"get_sleep_data error: {e}")
+        logging.error("get_sleep_data error: %s", e)
         return {"error": f"Failed to load sleep data: {e}"}
 
 
 @function_tool
-def send_text(message: str) -> str:
+async def send_text(message: str) -> str:
     """
     Wrapper around send_whatsapp_text, exposed to the Agent as a FunctionTool.
     """
-    return send_whatsapp_text(message)
+    return await send_whatsapp_text(message)
 
 
 @function_tool
-def ask_move_meeting() -> str:
+async def ask_move_meeting() -> str:
     """
     Sends a WhatsApp prompt asking approval to move the 7:30 AM 1:1 tomorrow.
     Does NOT read or echo the user's reply.
     """
     prompt = "Do you approve moving tomorrow's 7:30 AM 1:1 to a later time? Reply YES or NO."
-    send_result = send_whatsapp_text(prompt)
-    logging.info(f"ask_move_meeting → sent prompt, got: {send_result}")
+    send_result = await send_whatsapp_text(prompt)
+    logging.info("ask_move_meeting → sent prompt, got: %s", send_result)
     return send_result
 
 
@@ -284,36 +425,125 @@ Do NOT attempt to validate or echo the user's reply.
 # ASYNCHRONOUS "AUTOMATED TIME" PROMPTS
 # ──────────────────────────────────────────────────────────────────────────────
 
-async def main():
-    print("\n🚀 Demo: Automatically triggering 9:00 AM, 7:30 PM, and 10:00 PM events 🚀\n")
-
-    # 1) Simulate 9:00 AM via the Agent
+async def trigger_9am():
+    """9:00 AM: sleep recap and meeting prompt via the Agent"""
     print("\n[Trigger] EVENT_9AM\n")
-    result_9am = await Runner.run(orchestrator_agent, "EVENT_9AM")
-    print("→ Agent result (9AM):", result_9am, "\n")
-
-    # Wait 10 seconds
-    print("⏰ Waiting 10 seconds before 7:30 PM event...\n")
-    await asyncio.sleep(10)
-
-    # 2) Simulate 7:30 PM by calling start_screentime_limit_action() directly
+    # Stream the run so each send is reported as it happens rather than only
+    # after the agent has finished every step
+    result_9am = Runner.run_streamed(orchestrator_agent, "EVENT_9AM")
+    async for event in result_9am.stream_events():
+        if event.type != "run_item_stream_event":
+            continue
+        if event.item.type == "tool_call_item":
+            print(f"→ Tool call (9AM): {event.item.tool_name}")
+        elif event.item.type == "tool_call_output_item":
+            print(f"→ Tool output (9AM): {event.item.output}")
+    print("→ Agent result (9AM):", result_9am.final_output, "\n")
+
+
+async def trigger_730pm():
+    """7:30 PM: heads-up that screentime limits start at 10 PM"""
     print("\n[Trigger] Direct call: start_screentime_limit_action()\n")
     result_730pm = start_screentime_limit_action()
     print("→ start_screentime_limit_action result:", result_730pm, "\n")
 
-    # Wait 10 seconds
-    print("⏰ Waiting 10 seconds before 10:00 PM event...\n")
-    await asyncio.sleep(10)
 
-    # 3) Simulate 10:00 PM by calling activate_screentime_action(), send_sleep_mode_sms() & run_shortcut_action()
+async def trigger_10pm():
+    """10:00 PM: screentime notice, sleep-mode SMS and shortcut"""
     print("\n[Trigger] Direct call: activate_screentime_action(), send_sleep_mode_sms() & run_shortcut_action()\n")
+    # The notices go out through the background outbox; only the local
+    # shortcut is awaited here
     result_10pm_msg = activate_screentime_action()
-    print("→ activate_screentime_action result:", result_10pm_msg)
     result_10pm_sms = send_sleep_mode_sms()
+    result_10pm_shortcut = await run_shortcut_action()
+    print("→ activate_screentime_action result:", result_10pm_msg)
     print("→ send_sleep_mode_sms result:", result_10pm_sms)
-    result_10pm_shortcut = run_shortcut_action()
     print("→ run_shortcut_action result:", result_10pm_shortcut, "\n")
 
+
+# (hour, minute) wall-clock time -> trigger, in firing order
+DAILY_TRIGGERS = (
+    ((9, 0), trigger_9am),
+    ((19, 30), trigger_730pm),
+    ((22, 0), trigger_10pm),
+)
+
+# Gap between triggers when the demo compresses the day
+DEMO_SPACING_SECONDS = 10
+
+# Running trigger tasks; the loop only keeps weak references to tasks
+_trigger_tasks = set()
+
+
+def _fire(trigger, done: asyncio.Future = None) -> None:
+    """Timer callback: start a trigger as a task, resolving ``done`` after"""
+    def finished(task: asyncio.Task) -> None:
+        _trigger_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error("%s failed: %s", trigger.__name__, task.exception())
+        if done is not None and not done.done():
+            done.set_result(None)
+
+    task = asyncio.get_running_loop().create_task(trigger())
+    _trigger_tasks.add(task)
+    task.add_done_callback(finished)
+
+
+def _next_occurrence(hour: int, minute: int) -> datetime:
+    """The next local hour:minute after now"""
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+def _schedule_daily(hour: int, minute: int, trigger, target: datetime = None) -> None:
+    """Arm a timer for ``target`` (default: the next hour:minute) that re-arms
+    itself for the same time the following day after firing
+
+    The next target is derived from the intended one rather than from the
+    clock, since loop timers can fire slightly before the wall-clock target
+    and would otherwise re-arm for moments later and fire twice.
+    """
+    if target is None:
+        target = _next_occurrence(hour, minute)
+
+    def fire():
+        _fire(trigger)
+        _schedule_daily(hour, minute, trigger, target + timedelta(days=1))
+
+    delay = max((target - datetime.now()).total_seconds(), 0.0)
+    asyncio.get_running_loop().call_later(delay, fire)
+
+
+async def run_daily():
+    """Fire each trigger at its wall-clock time, every day
+
+    Nothing runs between triggers: each is a timer on the event loop, so
+    the process idles until the next one is due.
+    """
+    for (hour, minute), trigger in DAILY_TRIGGERS:
+        _schedule_daily(hour, minute, trigger)
+    await asyncio.Event().wait()
+
+
+async def main():
+    print("\n🚀 Demo: Automatically triggering 9:00 AM, 7:30 PM, and 10:00 PM events 🚀\n")
+
+    # Compress the day: start each trigger DEMO_SPACING_SECONDS after the
+    # previous one has finished and its queued notifications have gone out,
+    # so slow or retried sends cannot interleave with the next trigger's
+    loop = asyncio.get_running_loop()
+    print(f"⏰ Triggers run {DEMO_SPACING_SECONDS} seconds apart...\n")
+    for i, (_, trigger) in enumerate(DAILY_TRIGGERS):
+        if i:
+            await asyncio.sleep(DEMO_SPACING_SECONDS)
+        done = loop.create_future()
+        _fire(trigger, done)
+        await done
+        await drain_outbox()
+
     print("\n✅ All steps complete. ✅\n")
 
 
@@ -330,8 +560,12 @@ class WhatsAppWellnessAgent:
         self.name = f"WhatsApp Wellness Agent for {user_profile['name']}"
         self.agent = orchestrator_agent  # Use the pre-configured agent
         
-    async def process_message(self, user_message: str, capture_traces: bool = False) -> dict:
-        """Process a user message and return agent response"""
+    async def process_message(self, user_message: str, capture_traces: bool = False, stream_cb=None) -> dict:
+        """Process a user message and return agent response
+        
+        ``stream_cb`` is accepted for interface parity with the SDK agents;
+        WhatsApp agents always return the full response.
+        """
         try:
             # Note: WhatsApp agents don't have built-in tracing like SDK agents
             # but we can still return a compatible response format
@@ -353,7 +587,7 @@ class WhatsAppWellnessAgent:
             
             return response
         except Exception as e:
-            logging.error(f"Error processing message: {str(e)}")
+            logging.error("Error processing message: %s", e)
             return {
                 "message": "I encountered an error processing your request.",
                 "tool_calls": [],
@@ -363,6 +597,47 @@ class WhatsAppWellnessAgent:
             }
 
 
+@functools.lru_cache(maxsize=64)
+def _build_sleep_agent(
+    model: str,
+    name: str,
+    avg_sleep_hours: float,
+    work_hours: str,
+    stress_level: str
+) -> Agent:
+    """Build the sleep agent once per distinct profile and model
+    
+    Agents are stateless between runs, so instances for the same user and
+    model share one Agent instead of re-rendering its instructions.
+    """
+    return Agent(
+        name="WhatsAppSleepAgent",
+        model=model,
+        instructions=f"""
+        You are a WhatsApp-based sleep optimization specialist for {name}.
+        
+        User profile:
+        - Sleep average: {avg_sleep_hours} hours
+        - Work schedule: {work_hours}
+        - Stress level: {stress_level}
+        
+        For the demo workflow:
+        - At 09:00: Call get_sleep_data, analyze it, and send WhatsApp recap with emoji indicators
+        - At 19:30: Send WhatsApp reminder about 22:00 screen-time lock
+        - At 22:00: Send confirmation that apps are locked and execute shortcut
+        - At 22:05: Search for best OTC melatonin and send recommendations
+        - At 22:06: Process purchase if approved
+        
+        Use WhatsApp formatting:
+        - *bold* for emphasis
+        - _italics_ for secondary info
+        - Emojis for visual appeal
+        - Keep messages concise for mobile
+        """,
+        tools=[get_sleep_data, send_text, ask_move_meeting]
+    )
+
+
 class WhatsAppSleepAgent(WhatsAppWellnessAgent):
     """WhatsApp sleep optimization agent"""
     
@@ -370,35 +645,27 @@ class WhatsAppSleepAgent(WhatsAppWellnessAgent):
         super().__init__(user_profile, model)
         self.name = f"WhatsApp Sleep Agent for {user_profile['name']}"
         
-        # Create specialized sleep agent
-        self.agent = Agent(
-            name="WhatsAppSleepAgent",
-            model=model,
-            instructions=f"""
-            You are a WhatsApp-based sleep optimization specialist for {user_profile['name']}.
-            
-            User profile:
-            - Sleep average: {user_profile['health_metrics']['avg_sleep_hours']} hours
-            - Work schedule: {user_profile['schedule']['work_hours']}
-            - Stress level: {user_profile['health_metrics']['stress_level']}
-            
-            For the demo workflow:
-            - At 09:00: Call get_sleep_data, analyze it, and send WhatsApp recap with emoji indicators
-            - At 19:30: Send WhatsApp reminder about 22:00 screen-time lock
-            - At 22:00: Send confirmation that apps are locked and execute shortcut
-            - At 22:05: Search for best OTC melatonin and send recommendations
-            - At 22:06: Process purchase if approved
-            
-            Use WhatsApp formatting:
-            - *bold* for emphasis
-            - _italics_ for secondary info
-            - Emojis for visual appeal
-            - Keep messages concise for mobile
-            """,
-            tools=[get_sleep_data, send_text, ask_move_meeting]
+        # Specialized sleep agent, shared between instances with the same profile
+        self.agent = _build_sleep_agent(
+            model,
+            user_profile['name'],
+            user_profile['health_metrics']['avg_sleep_hours'],
+            user_profile['schedule']['work_hours'],
+            user_profile['health_metrics']['stress_level']
         )
 
 
-# Run the demo
+async def run_demo(daily: bool = False):
+    # Open the shared session up front; every trigger reuses it and the
+    # Twilio pool until shutdown
+    await _get_http_session()
+    try:
+        await (run_daily() if daily else main())
+    finally:
+        await close_clients()
+
+
+# Run the demo, or the real daily schedule with --daily
 if __name__ == "__main__":
-    asyncio.run(main())
+    import sys
+    asyncio.run(run_demo(daily="--daily" in sys.argv))
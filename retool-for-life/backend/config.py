@@ -15,6 +15,9 @@ class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL_DEFAULT = "gpt-4.1"
     OPENAI_MODEL_FAST = "gpt-4.1"
+    OPENAI_MAX_CONNECTIONS = 100
+    OPENAI_MAX_KEEPALIVE = 50
+    OPENAI_TIMEOUT = 60.0
     
     # Twilio Settings
     TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
@@ -27,6 +30,10 @@ class Settings:
     API_PORT = 8000
     API_URL = os.getenv("API_URL", "http://localhost:8000")
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    API_WORKERS = int(os.getenv("WORKERS", "1"))
+    DEV_RELOAD = os.getenv("DEV_RELOAD") == "1"
+    UVICORN_LOOP = os.getenv("UVICORN_LOOP", "uvloop")
+    UVICORN_HTTP = os.getenv("UVICORN_HTTP", "httptools")
     
     # CORS Settings
     CORS_ORIGINS = [
@@ -41,16 +48,33 @@ class Settings:
     DEMO_DELAY_SECONDS = 2
     
     # Agent Settings
+    # Each generated agent type is built once per model for evaluation
+    PRIMARY_MODEL = os.getenv("PRIMARY_MODEL", "gpt-4.1")
+    SECONDARY_MODEL = os.getenv("SECONDARY_MODEL", "gpt-4.1-mini")
     MAX_CONVERSATION_HISTORY = 20
     AGENT_TEMPERATURE = 0.7
     
     # Evaluation Settings
     EVALUATION_SCENARIOS_PER_AGENT = 4
+    EVALUATION_MAX_CONCURRENCY = 8  # Max in-flight agent calls during evaluation
+    # Reuse responses for identical (agent type, model, instructions, prompt) runs
+    EVALUATION_RESPONSE_CACHE = os.getenv("EVALUATION_RESPONSE_CACHE") == "1"
+    EVALUATION_RESPONSE_CACHE_SIZE = 512      # Cached responses kept in memory
+    EVALUATION_RESPONSE_CACHE_TTL = 60 * 60   # Seconds a response is reused after its call started
     MIN_AGENT_SCORE_THRESHOLD = 0.7
+    # Race each agent's model variants on a few scenarios and drop the slower
+    # one once a variant clears MIN_AGENT_SCORE_THRESHOLD
+    EVALUATION_SPECULATIVE_VARIANTS = os.getenv("EVALUATION_SPECULATIVE_VARIANTS") == "1"
+    EVALUATION_PROBE_SCENARIOS = 2
     
     # RLAIF Settings
     RLAIF_IMPROVEMENT_THRESHOLD = 0.8  # Trigger improvement if score < this
     RLAIF_WEAK_AREA_THRESHOLD = 0.7   # Areas scoring below this need improvement
+    RLAIF_HISTORY_LIMIT = 90          # Reward snapshots kept per agent
+    RLAIF_CACHE_SIZE = 256            # Cached instruction rewrites kept in memory
+    RLAIF_CACHE_SIMILARITY = 0.95     # Cosine similarity for a semantic cache hit
+    RLAIF_CACHE_PATH = os.getenv("RLAIF_CACHE_PATH")  # Optional SQLite file shared across workers
+    EMBEDDING_MODEL = "text-embedding-3-small"
     
     # WebSocket Settings
     WS_HEARTBEAT_INTERVAL = 30  # seconds
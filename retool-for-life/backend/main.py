@@ -2,25 +2,41 @@
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
 import asyncio
+import orjson
 import os
 import uuid
 
 from config import settings
-from orchestrator import MetaAgentOrchestrator, RLAIFOptimizer, load_test_scenarios
+from orchestrator import MetaAgentOrchestrator, RLAIFOptimizer, close_client, load_test_scenarios
 from agents_sdk import WellnessAgentSDK as WellnessAgent
-from tools import approve_action, get_pending_approvals
+from tools import approve_action, approve_actions, close_twilio_client, get_pending_approvals
 from mock_apis import MockHealthAPI
 
+class OrjsonResponse(Response):
+    """JSON response rendered with orjson; values orjson cannot encode
+    natively go through FastAPI's jsonable_encoder"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=jsonable_encoder,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="ReTool-for-Life API",
     description="Meta-agent wellness platform with autonomous agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=OrjsonResponse
 )
 
 # Enable CORS
@@ -73,6 +89,11 @@ class AppState:
                 }
             }
 
+def _dumps_ws(message: dict) -> str:
+    """Serialize a WebSocket message with the same encoder as HTTP responses"""
+    return orjson.dumps(message).decode()
+
+
 class WebSocketManager:
     """Manage WebSocket connections"""
     
@@ -90,14 +111,15 @@ class WebSocketManager:
     async def send_personal_message(self, message: dict, user_id: str):
         if user_id in self.active_connections:
             try:
-                await self.active_connections[user_id].send_json(message)
+                await self.active_connections[user_id].send_text(_dumps_ws(message))
             except:
                 self.disconnect(user_id)
     
     async def broadcast(self, message: dict):
+        payload = _dumps_ws(message)
         for user_id, connection in list(self.active_connections.items()):
             try:
-                await connection.send_json(message)
+                await connection.send_text(payload)
             except:
                 self.disconnect(user_id)
 
@@ -113,6 +135,13 @@ async def startup_event():
     print(f"Loaded {len(app_state.users)} users")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections on shutdown"""
+    await close_client()
+    await close_twilio_client()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -164,18 +193,27 @@ async def generate_agent(
         # Load test scenarios
         test_scenarios = load_test_scenarios()
         
+        # Probe runs from the variant race are reused by the full evaluation
+        probe_results = None
+        if settings.EVALUATION_SPECULATIVE_VARIANTS:
+            agents, probe_results = await app_state.orchestrator.prune_variants(agents, test_scenarios)
+        
         # Evaluate agents (now returns dict with scores and traces)
-        evaluation_result = await app_state.orchestrator.evaluate_agents(agents, test_scenarios)
+        evaluation_result = await app_state.orchestrator.evaluate_agents(
+            agents, test_scenarios, probe_results
+        )
         scores = evaluation_result["scores"]
         traces = evaluation_result["traces"]
         
-        # Deploy best agent
+        # Deploy best agent (scores are keyed the same way as agents_by_key)
+        agents_by_key = {f"{a.name} ({a.model})": a for a in agents}
         best_agent_name = max(scores, key=scores.get)
-        best_agent = next(a for a in agents if f"{a.name} ({a.model})" == best_agent_name)
+        best_agent = agents_by_key[best_agent_name]
         agent_id = app_state.orchestrator.deploy_agent(user_id, best_agent)
         
         # Initialize trace storage
         app_state.agent_traces[agent_id] = []
+        app_state.optimizer.reset_actions(agent_id)
         
         # Store evaluation traces for later retrieval
         app_state.evaluation_traces = traces
@@ -399,6 +437,7 @@ async def chat_with_agent(user_id: str, message: dict):
     agent_id = f"{user_id}-{agent.__class__.__name__}"
     if agent_id in app_state.agent_traces:
         app_state.agent_traces[agent_id].append(trace)
+        app_state.optimizer.record_action(agent_id, trace)
     
     # Send via WebSocket
     await app_state.websocket_manager.send_personal_message({
@@ -485,6 +524,7 @@ async def trigger_demo_sequence(user_id: str):
             agent_id = f"{user_id}-{agent.__class__.__name__}"
             if agent_id in app_state.agent_traces:
                 app_state.agent_traces[agent_id].append(trace)
+                app_state.optimizer.record_action(agent_id, trace)
             
             results.append(result)
             
@@ -574,6 +614,22 @@ async def approve_pending_action(approval_id: str):
     return result
 
 
+@app.post("/api/approvals/approve")
+async def approve_pending_actions(approval_ids: List[str]):
+    """Approve a batch of pending actions"""
+    results = await approve_actions(approval_ids)
+    
+    # Broadcast approvals
+    await app_state.websocket_manager.broadcast({
+        "type": "approvals_processed",
+        "approval_ids": [r["approval_id"] for r in results if r["status"] == "approved"],
+        "results": results,
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    return results
+
+
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """WebSocket endpoint for real-time updates"""
@@ -581,22 +637,22 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     
     try:
         # Send initial connection message
-        await websocket.send_json({
+        await websocket.send_text(_dumps_ws({
             "type": "connection",
             "status": "connected",
             "user_id": user_id,
             "timestamp": datetime.now().isoformat()
-        })
+        }))
         
         # Keep connection alive
         while True:
             data = await websocket.receive_text()
             # Echo back for now
-            await websocket.send_json({
+            await websocket.send_text(_dumps_ws({
                 "type": "echo",
                 "data": data,
                 "timestamp": datetime.now().isoformat()
-            })
+            }))
             
     except WebSocketDisconnect:
         app_state.websocket_manager.disconnect(user_id)
@@ -607,4 +663,15 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # App state (active agents, approvals, WebSocket connections) is held
+    # in-process, so keep WORKERS=1 unless that state moves to a shared store.
+    # Reload and multiple workers are mutually exclusive in uvicorn.
+    uvicorn.run(
+        "main:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        reload=settings.DEV_RELOAD,
+        workers=None if settings.DEV_RELOAD else settings.API_WORKERS,
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP
+    )
\ No newline at end of file
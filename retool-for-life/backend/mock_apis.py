@@ -2,57 +2,112 @@
 
 from datetime import datetime, timedelta
 import random
-from typing import Dict, List, Any
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
 
 class MockHealthAPI:
     """Mock health data API for demo purposes"""
     
+    # Samples are rolled once from a fixed seed and looked up by a hash of
+    # user and day, so the per-request path is a dict pack with no PRNG work
+    # and a user's readings stay stable for the day
+    _POOL_SIZE = 1024
+    _POOL_SEED = 20240601
+    _pool: Optional[Dict[str, List[Any]]] = None
+    
+    @classmethod
+    def _build_pool(cls) -> None:
+        """Roll the sample table for every metric field"""
+        rng = np.random.default_rng(cls._POOL_SEED)
+        n = cls._POOL_SIZE
+        cls._pool = {
+            # Sleep
+            "sleep_hours": np.round(6.5 + rng.uniform(-1.5, 1.5, n), 1).tolist(),
+            "sleep_quality": np.round(rng.uniform(0.6, 0.9, n), 2).tolist(),
+            "rem_sleep_minutes": rng.integers(70, 121, n).tolist(),
+            "deep_sleep_minutes": rng.integers(60, 101, n).tolist(),
+            "interruptions": rng.integers(0, 4, n).tolist(),
+            "heart_rate_avg": rng.integers(50, 66, n).tolist(),
+            "respiratory_rate": rng.integers(12, 17, n).tolist(),
+            # Activity
+            "steps": rng.integers(3000, 12001, n).tolist(),
+            "active_minutes": rng.integers(15, 61, n).tolist(),
+            "calories_burned": rng.integers(1800, 2501, n).tolist(),
+            "exercise_type": rng.choice(["walking", "running", "yoga", "strength"], n).tolist(),
+            "exercise_minutes": rng.integers(20, 46, n).tolist(),
+            "exercise_intensity": rng.choice(["low", "moderate", "high"], n).tolist(),
+            "sedentary_hours": np.round(rng.uniform(6, 10, n), 1).tolist(),
+            # Stress
+            "stress_level": rng.choice(["low", "moderate", "high"], n).tolist(),
+            "heart_rate_variability": rng.integers(30, 61, n).tolist(),
+            "recovery_score": np.round(rng.uniform(0.5, 0.9, n), 2).tolist(),
+            # Hydration
+            "water_intake_oz": rng.integers(40, 81, n).tolist(),
+            "percentage_complete": np.round(rng.uniform(0.6, 1.1, n), 2).tolist(),
+            "hours_since_logged": rng.integers(1, 4, n).tolist()
+        }
+    
+    @classmethod
+    def _index(cls, user_id: str) -> int:
+        """Return the sample row for a user on today's date"""
+        if cls._pool is None:
+            cls._build_pool()
+        key = f"{user_id}:{datetime.now().date().isoformat()}".encode()
+        return zlib.crc32(key) % cls._POOL_SIZE
+    
     @staticmethod
     async def get_sleep_metrics(user_id: str) -> Dict[str, Any]:
         """Get mock sleep data for a user"""
-        base_hours = 6.5
-        variation = random.uniform(-1.5, 1.5)
+        i = MockHealthAPI._index(user_id)
+        pool = MockHealthAPI._pool
         
         return {
             "user_id": user_id,
             "date": datetime.now().date().isoformat(),
-            "hours": round(base_hours + variation, 1),
-            "quality": round(random.uniform(0.6, 0.9), 2),
-            "rem_sleep_minutes": random.randint(70, 120),
-            "deep_sleep_minutes": random.randint(60, 100),
-            "interruptions": random.randint(0, 3),
-            "heart_rate_avg": random.randint(50, 65),
-            "respiratory_rate": random.randint(12, 16)
+            "hours": pool["sleep_hours"][i],
+            "quality": pool["sleep_quality"][i],
+            "rem_sleep_minutes": pool["rem_sleep_minutes"][i],
+            "deep_sleep_minutes": pool["deep_sleep_minutes"][i],
+            "interruptions": pool["interruptions"][i],
+            "heart_rate_avg": pool["heart_rate_avg"][i],
+            "respiratory_rate": pool["respiratory_rate"][i]
         }
     
     @staticmethod
     async def get_activity_data(user_id: str) -> Dict[str, Any]:
         """Get mock activity data for a user"""
+        i = MockHealthAPI._index(user_id)
+        pool = MockHealthAPI._pool
+        
         return {
             "user_id": user_id,
             "date": datetime.now().date().isoformat(),
-            "steps": random.randint(3000, 12000),
-            "active_minutes": random.randint(15, 60),
-            "calories_burned": random.randint(1800, 2500),
+            "steps": pool["steps"][i],
+            "active_minutes": pool["active_minutes"][i],
+            "calories_burned": pool["calories_burned"][i],
             "exercise_sessions": [
                 {
-                    "type": random.choice(["walking", "running", "yoga", "strength"]),
-                    "duration_minutes": random.randint(20, 45),
-                    "intensity": random.choice(["low", "moderate", "high"])
+                    "type": pool["exercise_type"][i],
+                    "duration_minutes": pool["exercise_minutes"][i],
+                    "intensity": pool["exercise_intensity"][i]
                 }
             ],
-            "sedentary_hours": round(random.uniform(6, 10), 1)
+            "sedentary_hours": pool["sedentary_hours"][i]
         }
     
     @staticmethod
     async def get_stress_metrics(user_id: str) -> Dict[str, Any]:
         """Get mock stress data for a user"""
+        i = MockHealthAPI._index(user_id)
+        pool = MockHealthAPI._pool
+        
         return {
             "user_id": user_id,
             "timestamp": datetime.now().isoformat(),
-            "stress_level": random.choice(["low", "moderate", "high"]),
-            "heart_rate_variability": random.randint(30, 60),
-            "recovery_score": round(random.uniform(0.5, 0.9), 2),
+            "stress_level": pool["stress_level"][i],
+            "heart_rate_variability": pool["heart_rate_variability"][i],
+            "recovery_score": pool["recovery_score"][i],
             "recommendations": [
                 "Take a 5-minute breathing break",
                 "Go for a short walk",
@@ -63,13 +118,16 @@ class MockHealthAPI:
     @staticmethod
     async def get_hydration_data(user_id: str) -> Dict[str, Any]:
         """Get mock hydration data"""
+        i = MockHealthAPI._index(user_id)
+        pool = MockHealthAPI._pool
+        
         return {
             "user_id": user_id,
             "date": datetime.now().date().isoformat(),
-            "water_intake_oz": random.randint(40, 80),
+            "water_intake_oz": pool["water_intake_oz"][i],
             "goal_oz": 64,
-            "percentage_complete": round(random.uniform(0.6, 1.1), 2),
-            "last_logged": (datetime.now() - timedelta(hours=random.randint(1, 3))).isoformat()
+            "percentage_complete": pool["percentage_complete"][i],
+            "last_logged": (datetime.now() - timedelta(hours=pool["hours_since_logged"][i])).isoformat()
         }
 
 
@@ -102,7 +160,7 @@ class MockCalendarAPI:
                     "Sprint Planning", "Design Review", "Budget Meeting"
                 ]),
                 "start": f"{today}T{time}:00",
-                "end": f"{today}T{time.split(':')[0]}:{int(time.split(':')[1]) + 30:02d}:00",
+                "end": (datetime.fromisoformat(f"{today}T{time}:00") + timedelta(minutes=30)).isoformat(),
                 "type": "meeting",
                 "recurring": False
             })
@@ -112,10 +170,45 @@ class MockCalendarAPI:
     @staticmethod
     async def analyze_schedule_density(events: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze calendar density and suggest optimizations"""
-        meeting_hours = sum(
-            (datetime.fromisoformat(e["end"]) - datetime.fromisoformat(e["start"])).seconds / 3600
-            for e in events
+        return MockCalendarAPI.schedule_density(events)
+    
+    @staticmethod
+    def event_minutes(events: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end of each event as minutes since midnight of the first
+        event's day, so events past midnight or on later days keep their order"""
+        if not events:
+            return np.empty(0), np.empty(0)
+        day = datetime.fromisoformat(events[0]["start"]).replace(
+            hour=0, minute=0, second=0, microsecond=0
         )
+        starts = np.fromiter(
+            ((datetime.fromisoformat(e["start"]) - day).total_seconds() / 60 for e in events),
+            dtype=np.float64, count=len(events)
+        )
+        ends = np.fromiter(
+            ((datetime.fromisoformat(e["end"]) - day).total_seconds() / 60 for e in events),
+            dtype=np.float64, count=len(events)
+        )
+        return starts, ends
+    
+    @staticmethod
+    def schedule_density(
+        events: List[Dict[str, Any]],
+        minutes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Dict[str, Any]:
+        """Compute schedule density from events (pure, no I/O)
+        
+        ``minutes`` takes precomputed ``event_minutes`` arrays for large
+        calendars, summing durations in one vectorized pass.
+        """
+        if minutes is not None:
+            starts, ends = minutes
+            meeting_hours = float((ends - starts).sum()) / 60
+        else:
+            meeting_hours = sum(
+                (datetime.fromisoformat(e["end"]) - datetime.fromisoformat(e["start"])).total_seconds() / 3600
+                for e in events
+            )
         
         return {
             "total_meetings": len(events),
@@ -132,42 +225,34 @@ class MockCalendarAPI:
 class MockCommerceAPI:
     """Mock commerce API for wellness product searches"""
     
+    # Product catalog by category, built once
+    _PRODUCT_CATALOG = {
+        "sleep": (
+            {"name": "Melatonin 5mg (60 tablets)", "price": 12.99, "rating": 4.5},
+            {"name": "Magnesium Glycinate 400mg", "price": 24.99, "rating": 4.7},
+            {"name": "Chamomile Tea (30 bags)", "price": 8.99, "rating": 4.3},
+            {"name": "Sleep Mask with Bluetooth", "price": 39.99, "rating": 4.6},
+            {"name": "White Noise Machine", "price": 49.99, "rating": 4.8}
+        ),
+        "stress": (
+            {"name": "Ashwagandha 600mg", "price": 19.99, "rating": 4.6},
+            {"name": "L-Theanine 200mg", "price": 16.99, "rating": 4.4},
+            {"name": "Stress Relief Essential Oil Blend", "price": 14.99, "rating": 4.5},
+            {"name": "Acupressure Mat", "price": 34.99, "rating": 4.3},
+            {"name": "Meditation App Annual Subscription", "price": 69.99, "rating": 4.7}
+        ),
+        "hydration": (
+            {"name": "Smart Water Bottle with Reminder", "price": 29.99, "rating": 4.4},
+            {"name": "Electrolyte Powder (30 servings)", "price": 22.99, "rating": 4.6},
+            {"name": "Himalayan Pink Salt", "price": 9.99, "rating": 4.5},
+            {"name": "Coconut Water (12 pack)", "price": 24.99, "rating": 4.3},
+            {"name": "Hydration Tracking App Premium", "price": 4.99, "rating": 4.2}
+        )
+    }
+    
     @staticmethod
     async def search_wellness_products(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Mock product search results"""
-        product_templates = [
-            {
-                "category": "sleep",
-                "products": [
-                    {"name": "Melatonin 5mg (60 tablets)", "price": 12.99, "rating": 4.5},
-                    {"name": "Magnesium Glycinate 400mg", "price": 24.99, "rating": 4.7},
-                    {"name": "Chamomile Tea (30 bags)", "price": 8.99, "rating": 4.3},
-                    {"name": "Sleep Mask with Bluetooth", "price": 39.99, "rating": 4.6},
-                    {"name": "White Noise Machine", "price": 49.99, "rating": 4.8}
-                ]
-            },
-            {
-                "category": "stress",
-                "products": [
-                    {"name": "Ashwagandha 600mg", "price": 19.99, "rating": 4.6},
-                    {"name": "L-Theanine 200mg", "price": 16.99, "rating": 4.4},
-                    {"name": "Stress Relief Essential Oil Blend", "price": 14.99, "rating": 4.5},
-                    {"name": "Acupressure Mat", "price": 34.99, "rating": 4.3},
-                    {"name": "Meditation App Annual Subscription", "price": 69.99, "rating": 4.7}
-                ]
-            },
-            {
-                "category": "hydration",
-                "products": [
-                    {"name": "Smart Water Bottle with Reminder", "price": 29.99, "rating": 4.4},
-                    {"name": "Electrolyte Powder (30 servings)", "price": 22.99, "rating": 4.6},
-                    {"name": "Himalayan Pink Salt", "price": 9.99, "rating": 4.5},
-                    {"name": "Coconut Water (12 pack)", "price": 24.99, "rating": 4.3},
-                    {"name": "Hydration Tracking App Premium", "price": 4.99, "rating": 4.2}
-                ]
-            }
-        ]
-        
         # Find relevant category based on query
         category = "sleep"  # default
         query_lower = query.lower()
@@ -176,7 +261,7 @@ class MockCommerceAPI:
         elif "water" in query_lower or "hydrat" in query_lower:
             category = "hydration"
         
-        products = next(cat["products"] for cat in product_templates if cat["category"] == category)
+        products = MockCommerceAPI._PRODUCT_CATALOG[category]
         
         # Add mock details to each product
         results = []
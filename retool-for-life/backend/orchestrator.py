@@ -1,55 +1,116 @@
 """Meta-agent orchestrator for generating and evaluating wellness agents"""
 
-from typing import Dict, List, Any, Optional
+from typing import Deque, Dict, List, Any, Optional, Set, Tuple
+from collections import Counter, OrderedDict, deque
 from datetime import datetime
+import hashlib
+import importlib
+import importlib.util
 import json
 import asyncio
+import sqlite3
+import time
+import numpy as np
+from config import settings
+
+# Optional multi-pattern matcher for scoring scenario outcomes in one pass
 try:
-    # Try to import SDK agents first
-    from agents_sdk import (
-        WellnessAgentSDK as WellnessAgent,
-        SleepOptimizationAgentSDK as SleepOptimizationAgent,
-        StressManagementAgentSDK as StressManagementAgent,
-        FitnessAgentSDK as FitnessAgent,
-        NutritionAgentSDK as NutritionAgent
-    )
-    print("Using OpenAI Agents SDK implementation")
+    import ahocorasick
 except ImportError:
-    try:
-        # Try v2 agents
-        from agents_v2 import (
-            WellnessAgentV2 as WellnessAgent,
-            SleepOptimizationAgentV2 as SleepOptimizationAgent,
-            StressManagementAgentV2 as StressManagementAgent,
-            FitnessAgentV2 as FitnessAgent,
-            NutritionAgentV2 as NutritionAgent
-        )
-        print("Using OpenAI Agents SDK v2")
-    except ImportError:
-        # Fallback to SDK agents
-        from agents_sdk import (
-            WellnessAgentSDK as WellnessAgent,
-            SleepOptimizationAgentSDK as SleepOptimizationAgent,
-            StressManagementAgentSDK as StressManagementAgent,
-            FitnessAgentSDK as FitnessAgent,
-            NutritionAgentSDK as NutritionAgent
-        )
-        print("Using SDK agents implementation")
+    ahocorasick = None
+
+# Resolve the agent implementation without paying for failed imports:
+# the first module that exists wins
+_AGENT_MODULES = (
+    ("agents_sdk", "SDK", "Using OpenAI Agents SDK implementation"),
+    ("agents_v2", "V2", "Using OpenAI Agents SDK v2"),
+)
+for _module_name, _suffix, _message in _AGENT_MODULES:
+    if importlib.util.find_spec(_module_name) is not None:
+        _agent_module = importlib.import_module(_module_name)
+        print(_message)
+        break
+else:
+    raise ImportError("No wellness agent implementation found (agents_sdk or agents_v2)")
+
+WellnessAgent = getattr(_agent_module, f"WellnessAgent{_suffix}")
+SleepOptimizationAgent = getattr(_agent_module, f"SleepOptimizationAgent{_suffix}")
+StressManagementAgent = getattr(_agent_module, f"StressManagementAgent{_suffix}")
+FitnessAgent = getattr(_agent_module, f"FitnessAgent{_suffix}")
+NutritionAgent = getattr(_agent_module, f"NutritionAgent{_suffix}")
 
 # Import WhatsApp agents
 try:
     from agents_whatsapp import WhatsAppWellnessAgent, WhatsAppSleepAgent
+    from agents_whatsapp import close_clients as close_whatsapp_clients
     print("WhatsApp agents available")
 except ImportError:
     WhatsAppWellnessAgent = None
     WhatsAppSleepAgent = None
+    close_whatsapp_clients = None
     print("WhatsApp agents not available")
 from openai import AsyncOpenAI
+import httpx
 import os
 from dotenv import load_dotenv
 
+# HTTP/2 needs the h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 load_dotenv()
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# One pooled connection set shared by every OpenAI call in the process, so
+# concurrent evaluations and RLAIF updates multiplex over warm connections
+http_client = httpx.AsyncClient(
+    http2=_HTTP2_AVAILABLE,
+    limits=httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE
+    ),
+    timeout=settings.OPENAI_TIMEOUT
+)
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
+
+async def close_client():
+    """Close the shared OpenAI client and its connection pool, along with
+    the WhatsApp agents' messaging clients when they are loaded"""
+    await client.close()
+    if close_whatsapp_clients is not None:
+        await close_whatsapp_clients()
+
+# Optimization rubric shared by every improvement call. At roughly 300
+# tokens it is below the provider's 1024-token prompt-caching minimum, so
+# it is not served from cache; it is kept here so every call sees the same rubric.
+OPTIMIZATION_SYSTEM_PROMPT = """
+You are an AI agent optimization expert. You rewrite the instructions of
+personalized wellness agents based on their recent performance metrics.
+
+Reward dimensions (each scored from 0.0 to 1.0):
+- task_completion: share of requested tasks the agent completed successfully
+- user_engagement: how well the agent's messages were received and acted on
+- timing_accuracy: whether actions happened at appropriate times for the user's schedule
+- resource_efficiency: economy of tool calls, API usage and tokens
+- safety_compliance: whether approval was requested before sensitive actions
+
+Improvement policy:
+- Focus on the weak areas listed by the user; leave strong areas unchanged.
+- Keep the agent's core responsibilities, specialty, personality and
+  communication style intact.
+- Keep every user profile fact (name, IDs, phone number, schedule, goals).
+- Never remove or weaken approval requirements for purchases or messages.
+- Prefer concrete, actionable rules over general advice.
+- Keep the instructions concise; do not repeat the metrics back.
+
+Output format:
+- Return only the complete revised instructions as plain text, ready to be
+  used directly as the agent's system prompt.
+- Do not include a preamble, commentary or markdown code fences.
+"""
 
 
 class MetaAgentOrchestrator:
@@ -68,141 +129,360 @@ class MetaAgentOrchestrator:
             self.agent_templates["whatsapp_sleep_specialist"] = WhatsAppSleepAgent
         if WhatsAppWellnessAgent:
             self.agent_templates["whatsapp_wellness"] = WhatsAppWellnessAgent
+        
+        # Map goals to agent types; WhatsApp availability is fixed at import,
+        # so the WhatsApp variant of the map is resolved once here
+        self._goal_map_default = {
+            "better_sleep": "sleep_specialist",
+            "stress_reduction": "stress_manager",
+            "stress_management": "stress_manager",
+            "exercise_consistency": "fitness_coach",
+            "hydration": "nutrition_advisor"
+        }
+        self._goal_map_whatsapp = None
+        if "whatsapp_sleep_specialist" in self.agent_templates:
+            self._goal_map_whatsapp = {
+                **self._goal_map_default,
+                "better_sleep": "whatsapp_sleep_specialist"
+            }
             
         self.active_agents: Dict[str, WellnessAgent] = {}
         
+        # Responses from earlier evaluation runs, keyed on everything that
+        # determines the agent's output (off by default; see settings)
+        self.cache_eval_responses = settings.EVALUATION_RESPONSE_CACHE
+        # key -> (call, started_at), least recently used first. Instructions
+        # change with every RLAIF rewrite, so entries are bounded in number
+        # and finished calls expire
+        self._eval_cache: "OrderedDict[Tuple[str, str, int, str], Tuple[asyncio.Future, float]]" = OrderedDict()
+        # Callers currently awaiting each in-flight cached call
+        self._eval_waiters: Dict[Tuple[str, str, int, str], int] = {}
+        
     async def generate_agent_suite(
         self, 
         user_profile: Dict[str, Any]
     ) -> List[WellnessAgent]:
         """Generate multiple agent variants for evaluation"""
         
-        agents = []
-        
         # Determine which agents to create based on user goals
         user_goals = user_profile["preferences"]["wellness_goals"]
         
         # Check if user prefers WhatsApp
         prefers_whatsapp = user_profile.get("preferences", {}).get("messaging_channel") == "whatsapp"
         
-        # Map goals to agent types
-        goal_agent_map = {
-            "better_sleep": "whatsapp_sleep_specialist" if prefers_whatsapp and WhatsAppSleepAgent and "whatsapp_sleep_specialist" in self.agent_templates else "sleep_specialist",
-            "stress_reduction": "stress_manager",
-            "stress_management": "stress_manager",
-            "exercise_consistency": "fitness_coach",
-            "hydration": "nutrition_advisor"
-        }
+        goal_agent_map = (
+            self._goal_map_whatsapp
+            if prefers_whatsapp and self._goal_map_whatsapp
+            else self._goal_map_default
+        )
         
-        # Create agents based on user goals
+        # Collect (agent_class, model) variants based on user goals
+        variants = []
         created_types = set()
         for goal in user_goals:
             agent_type = goal_agent_map.get(goal)
             if agent_type and agent_type not in created_types:
                 agent_class = self.agent_templates[agent_type]
                 # Create with different model variations
-                agents.append(agent_class(user_profile, model="gpt-4.1"))
-            
-                agents.append(agent_class(user_profile, model="gpt-4.1-mini"))
+                variants.append((agent_class, settings.PRIMARY_MODEL))
+                variants.append((agent_class, settings.SECONDARY_MODEL))
                 created_types.add(agent_type)
         
         # Ensure at least one general wellness agent
-        if not agents:
-            agents.append(WellnessAgent(user_profile, model="gpt-4.1"))
+        if not variants:
+            variants.append((WellnessAgent, settings.PRIMARY_MODEL))
+        
+        # Constructors are independent, so build them off the event loop together
+        agents = await asyncio.gather(*(
+            asyncio.to_thread(agent_class, user_profile, model=model)
+            for agent_class, model in variants
+        ))
+        
+        return list(agents)
+    
+    async def prune_variants(
+        self,
+        agents: List[WellnessAgent],
+        test_scenarios: List[Dict[str, Any]]
+    ) -> Tuple[List[WellnessAgent], Dict[WellnessAgent, List[Tuple[float, Dict[str, Any]]]]]:
+        """Race the model variants of each agent type, keeping early winners
+        
+        Returns the surviving agents and the probe results of every variant
+        whose probe finished, for ``evaluate_agents`` to reuse.
+        """
+        groups: Dict[type, List[WellnessAgent]] = {}
+        for agent in agents:
+            groups.setdefault(type(agent), []).append(agent)
+        
+        probe = test_scenarios[:settings.EVALUATION_PROBE_SCENARIOS]
+        probe_results: Dict[WellnessAgent, List[Tuple[float, Dict[str, Any]]]] = {}
+        survivors = await asyncio.gather(*(
+            self.select_best_variant(variants, probe, probe_results)
+            for variants in groups.values()
+        ))
+        return [agent for group in survivors for agent in group], probe_results
+    
+    async def select_best_variant(
+        self,
+        agents: List[WellnessAgent],
+        test_scenarios: List[Dict[str, Any]],
+        probe_results: Optional[Dict[WellnessAgent, List[Tuple[float, Dict[str, Any]]]]] = None
+    ) -> List[WellnessAgent]:
+        """Run variants side by side and keep the first that scores well enough
+        
+        Each variant is probed on ``test_scenarios``. The first to finish with
+        an average of at least MIN_AGENT_SCORE_THRESHOLD wins and the others are
+        cancelled; if none qualifies, all variants are returned for the full
+        evaluation to decide. Finished probes are recorded in ``probe_results``.
+        """
+        if len(agents) < 2 or not test_scenarios:
+            return agents
+        
+        for scenario in test_scenarios:
+            _compile_scenario(scenario)
         
+        async def probe(agent: WellnessAgent) -> float:
+            results = await asyncio.gather(*(
+                self._evaluate_scenario(agent, scenario) for scenario in test_scenarios
+            ))
+            if probe_results is not None:
+                probe_results[agent] = results
+            return sum(score for score, _ in results) / len(results)
+        
+        tasks = {asyncio.create_task(probe(agent)): agent for agent in agents}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() >= settings.MIN_AGENT_SCORE_THRESHOLD:
+                        return [tasks[task]]
+        finally:
+            for task in pending:
+                task.cancel()
         return agents
     
     async def evaluate_agents(
         self,
         agents: List[WellnessAgent],
-        test_scenarios: List[Dict[str, Any]]
+        test_scenarios: List[Dict[str, Any]],
+        known_results: Optional[Dict[WellnessAgent, List[Tuple[float, Dict[str, Any]]]]] = None
     ) -> Dict[str, Any]:
-        """Run evaluation scenarios and score agents with trace data"""
+        """Run evaluation scenarios and score agents with trace data
+        
+        ``known_results`` maps agents to results already computed for the
+        leading scenarios (e.g. the probes from ``prune_variants``); those
+        runs are reused instead of repeated.
+        """
+        
+        for scenario in test_scenarios:
+            _compile_scenario(scenario)
+        known_results = known_results or {}
+        
+        # Each (agent, scenario) pair is an independent LLM round-trip. A fixed
+        # pool of workers drains them from a queue, so a slot is refilled as
+        # soon as any run finishes instead of waiting on stragglers, and
+        # in-flight calls stay under provider rate limits
+        queue: asyncio.Queue = asyncio.Queue()
+        results: List[Tuple[float, Dict[str, Any]]] = []
+        for agent in agents:
+            known = known_results.get(agent, [])
+            for j, scenario in enumerate(test_scenarios):
+                if j < len(known):
+                    results.append(known[j])
+                else:
+                    queue.put_nowait((len(results), (agent, scenario)))
+                    results.append(None)
+        
+        async def worker():
+            while not queue.empty():
+                index, (agent, scenario) = queue.get_nowait()
+                results[index] = await self._evaluate_scenario(agent, scenario)
+        
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(settings.EVALUATION_MAX_CONCURRENCY, queue.qsize())):
+                tg.create_task(worker())
         
         scores = {}
         evaluation_traces = {}
+        num_scenarios = len(test_scenarios)
         
-        for agent in agents:
-            total_score = 0
-            agent_traces = []
-            
-            for scenario in test_scenarios:
-                # Process the scenario with the agent
-                try:
-                    # All agents now support capture_traces parameter
-                    response = await agent.process_message(
-                        scenario["prompt"], 
-                        capture_traces=True
-                    )
-                    
-                    # Score based on expected outcomes
-                    score = await self._calculate_score(
-                        response,
-                        scenario.get("expected_outcomes", []),
-                        scenario.get("required_tools", [])
-                    )
-                    total_score += score
-                    
-                    # Capture trace data if available
-                    trace_info = {
-                        "scenario": scenario["name"],
-                        "prompt": scenario["prompt"],
-                        "score": score,
-                        "response": response.get("message", ""),
-                        "trace_data": response.get("trace_data", None)
-                    }
-                    agent_traces.append(trace_info)
-                    
-                except Exception as e:
-                    print(f"Error evaluating agent {agent.name}: {e}")
-                    total_score += 0.5  # Partial credit for not crashing
-                    agent_traces.append({
-                        "scenario": scenario["name"],
-                        "error": str(e),
-                        "score": 0.5
-                    })
+        for i, agent in enumerate(agents):
+            agent_results = results[i * num_scenarios:(i + 1) * num_scenarios]
+            total_score = sum(score for score, _ in agent_results)
             
             # Average score across scenarios
-            avg_score = total_score / len(test_scenarios) if test_scenarios else 0
+            avg_score = total_score / num_scenarios if num_scenarios else 0
             agent_key = f"{agent.name} ({agent.model})"
             scores[agent_key] = avg_score
-            evaluation_traces[agent_key] = agent_traces
+            evaluation_traces[agent_key] = [trace_info for _, trace_info in agent_results]
         
         return {
             "scores": scores,
             "traces": evaluation_traces
         }
     
-    async def _calculate_score(
+    async def _evaluate_scenario(
+        self,
+        agent: WellnessAgent,
+        scenario: Dict[str, Any]
+    ) -> Tuple[float, Dict[str, Any]]:
+        """Run one scenario against an agent and return its score and trace"""
+        try:
+            # Stream and stop generating once the maximum score is reached,
+            # unless the scenario opts out to inspect the whole response
+            stream_cb = None
+            if not scenario.get("needs_full_response"):
+                stream_cb = _ScoreWatcher(scenario, _agent_tool_names(agent)).observe
+            
+            if self.cache_eval_responses:
+                response = await self._cached_response(agent, scenario["prompt"], stream_cb)
+            else:
+                response = await self._run_scenario(agent, scenario["prompt"], stream_cb)
+            
+            # Read the response once for both scoring and the trace
+            message, tool_calls, trace_data = _extract(response)
+            
+            # Score based on expected outcomes
+            score = self._calculate_score(
+                message,
+                tool_calls,
+                scenario["_expected_lower"],
+                scenario["_required_tools_set"],
+                scenario["_outcome_automaton"]
+            )
+            
+            # Capture trace data if available
+            trace_info = {
+                "scenario": scenario["name"],
+                "prompt": scenario["prompt"],
+                "score": score,
+                "response": message,
+                "trace_data": trace_data
+            }
+            return score, trace_info
+            
+        except Exception as e:
+            print(f"Error evaluating agent {agent.name}: {e}")
+            # Partial credit for not crashing
+            return 0.5, {
+                "scenario": scenario["name"],
+                "error": str(e),
+                "score": 0.5
+            }
+    
+    async def _run_scenario(
+        self,
+        agent: WellnessAgent,
+        prompt: str,
+        stream_cb: Any = None
+    ) -> Dict[str, Any]:
+        """Send a scenario prompt to an agent"""
+        # All agents now support capture_traces parameter
+        if stream_cb is None:
+            return await agent.process_message(prompt, capture_traces=True)
+        return await agent.process_message(prompt, capture_traces=True, stream_cb=stream_cb)
+    
+    async def _cached_response(
+        self,
+        agent: WellnessAgent,
+        prompt: str,
+        stream_cb: Any = None
+    ) -> Dict[str, Any]:
+        """Run a scenario once per identical agent configuration and prompt
+        
+        Concurrent requests for the same key share one in-flight call. Failed
+        calls are evicted so they are retried on the next evaluation, and a
+        call whose last waiter is cancelled is cancelled too rather than left
+        running (and billed) with nobody to read it.
+        """
+        key = (
+            type(agent).__name__,
+            agent.model,
+            hash(_agent_instructions(agent)),
+            prompt
+        )
+        future = self._cached_eval(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run_scenario(agent, prompt, stream_cb))
+            self._eval_cache[key] = (future, time.monotonic())
+            while len(self._eval_cache) > settings.EVALUATION_RESPONSE_CACHE_SIZE:
+                self._eval_cache.popitem(last=False)
+        
+        waiters = self._eval_waiters
+        waiters[key] = waiters.get(key, 0) + 1
+        try:
+            response = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if waiters[key] == 1 and not future.done():
+                future.cancel()
+                self._evict_eval(key, future)
+            raise
+        except Exception:
+            self._evict_eval(key, future)
+            raise
+        finally:
+            waiters[key] -= 1
+            if not waiters[key]:
+                del waiters[key]
+        
+        if not response.get("success", True):
+            self._evict_eval(key, future)
+        return response
+    
+    def _cached_eval(self, key: Tuple[str, str, int, str]) -> Optional[asyncio.Future]:
+        """Return the cached call for ``key`` unless it finished and expired"""
+        entry = self._eval_cache.get(key)
+        if entry is None:
+            return None
+        future, started_at = entry
+        if future.done() and time.monotonic() - started_at > settings.EVALUATION_RESPONSE_CACHE_TTL:
+            del self._eval_cache[key]
+            return None
+        self._eval_cache.move_to_end(key)
+        return future
+    
+    def _evict_eval(self, key: Tuple[str, str, int, str], future: asyncio.Future) -> None:
+        """Drop ``future`` from the cache if it is still the entry for ``key``"""
+        entry = self._eval_cache.get(key)
+        if entry is not None and entry[0] is future:
+            del self._eval_cache[key]
+    
+    def _calculate_score(
         self,
-        response: Any,
+        message: str,
+        tool_calls: List[Any],
         expected_outcomes: List[str],
-        required_tools: List[str]
+        required_tools: Set[str],
+        outcome_automaton: Any = None
     ) -> float:
-        """Calculate score based on agent response"""
+        """Calculate score from a response's message and tool calls
+        
+        Use ``_extract`` to pull both out of a raw response.
+        ``expected_outcomes`` must already be lowercased (see _compile_scenario).
+        When an Aho-Corasick ``outcome_automaton`` is given, all outcomes are
+        matched in a single pass over the message.
+        """
         score = 0.0
         
         # Check if required tools were used
         if required_tools:
-            # Handle both dict and object response types
-            tool_calls = []
-            if isinstance(response, dict):
-                tool_calls = response.get("tool_calls", [])
-            elif hasattr(response, "tool_calls"):
-                tool_calls = response.tool_calls
-            
             if tool_calls:
-                used_tools = [tc.get("tool_name", tc.tool_name if hasattr(tc, "tool_name") else "") for tc in tool_calls]
-                tool_score = len(set(used_tools) & set(required_tools)) / len(required_tools)
+                used_tools = {tc.get("tool_name", tc.tool_name if hasattr(tc, "tool_name") else "") for tc in tool_calls}
+                tool_score = len(used_tools & required_tools) / len(required_tools)
                 score += tool_score * 0.5
         
         # Check if response addresses expected outcomes
-        message = response.get("message", "") if isinstance(response, dict) else getattr(response, "message", "")
         if expected_outcomes and message:
-            addressed = sum(
-                1 for outcome in expected_outcomes 
-                if outcome.lower() in message.lower()
-            )
+            message_lower = message.lower()
+            if outcome_automaton is not None:
+                matched = {value for _, value in outcome_automaton.iter(message_lower)}
+                addressed = sum(count for _, count in matched)
+            else:
+                addressed = sum(
+                    1 for outcome in expected_outcomes 
+                    if outcome in message_lower
+                )
             outcome_score = addressed / len(expected_outcomes)
             score += outcome_score * 0.5
         
@@ -214,7 +494,7 @@ class MetaAgentOrchestrator:
     
     def deploy_agent(self, user_id: str, agent: WellnessAgent) -> str:
         """Deploy an agent for a user"""
-        agent_id = f"{user_id}-{agent.__class__.__name__}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        agent_id = f"{user_id}-{agent.__class__.__name__}-{time.time_ns()}"
         self.active_agents[user_id] = agent
         return agent_id
     
@@ -223,11 +503,274 @@ class MetaAgentOrchestrator:
         return self.active_agents.get(user_id)
 
 
+class EmbeddingBatcher:
+    """Coalesce concurrent embedding requests into batched API calls
+    
+    Texts submitted within ``max_wait`` seconds of each other, up to
+    ``max_batch`` at a time, go out in a single embeddings request and the
+    vectors are handed back to each waiting caller by index.
+    """
+    
+    def __init__(
+        self,
+        model: str = settings.EMBEDDING_MODEL,
+        max_batch: int = 64,
+        max_wait: float = 0.02
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        # Full-batch flushes in flight; the loop only keeps weak references
+        self._flush_tasks: Set[asyncio.Task] = set()
+    
+    async def embed(self, text: str) -> List[float]:
+        """Queue a text for the next batch and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= self.max_batch:
+            task = loop.create_task(self._flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        elif self._timer is None:
+            self._timer = loop.create_task(self._flush_after_wait())
+        
+        return await future
+    
+    async def _flush_after_wait(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        while self._pending:
+            await self._flush()
+    
+    async def _flush(self) -> None:
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        if not batch:
+            return
+        
+        try:
+            response = await client.embeddings.create(
+                model=self.model,
+                input=[text for text, _ in batch]
+            )
+            for item in response.data:
+                future = batch[item.index][1]
+                if not future.done():
+                    future.set_result(item.embedding)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class ImprovementCache:
+    """Two-tier cache for RLAIF instruction rewrites
+    
+    Exact hits are keyed on (agent class, weak areas, instructions hash). On a
+    miss, the improvement prompt's embedding is compared against earlier
+    prompts for the same agent class and user, so a recurring failure mode
+    reuses a rewrite instead of making another LLM call. Semantic matches are
+    never shared across users because rewrites embed profile details.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = settings.RLAIF_CACHE_SIZE,
+        similarity_threshold: float = settings.RLAIF_CACHE_SIMILARITY,
+        db_path: Optional[str] = settings.RLAIF_CACHE_PATH
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.db_path = db_path
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        self._semantic: Dict[str, List[Tuple[np.ndarray, str]]] = {}
+        
+        if db_path:
+            self._load()
+    
+    @staticmethod
+    def exact_key(agent_type: str, weak_areas: List[str], instructions: str) -> str:
+        """Build the exact-match key for a rewrite request"""
+        digest = hashlib.sha256(instructions.encode()).hexdigest()[:16]
+        return json.dumps([agent_type, sorted(weak_areas), digest])
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return an exact-match rewrite, refreshing its LRU position"""
+        if key not in self._exact:
+            return None
+        self._exact.move_to_end(key)
+        return self._exact[key]
+    
+    def find_similar(self, scope: str, embedding: np.ndarray) -> Optional[str]:
+        """Return the closest stored rewrite in scope above the threshold"""
+        entries = self._semantic.get(scope)
+        if not entries:
+            return None
+        
+        # Embeddings are stored unit-normalised, so a dot product is the cosine
+        similarities = np.stack([vec for vec, _ in entries]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.similarity_threshold:
+            return entries[best][1]
+        return None
+    
+    async def put(
+        self,
+        key: str,
+        scope: str,
+        embedding: Optional[np.ndarray],
+        response: str
+    ) -> None:
+        """Store a rewrite in both tiers and persist it if configured"""
+        self._remember(key, scope, embedding, response)
+        if self.db_path:
+            await asyncio.to_thread(self._persist, key, scope, embedding, response)
+    
+    @staticmethod
+    def normalise(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+    
+    def _remember(
+        self,
+        key: str,
+        scope: str,
+        embedding: Optional[np.ndarray],
+        response: str
+    ) -> None:
+        self._exact[key] = response
+        self._exact.move_to_end(key)
+        while len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+        
+        if embedding is not None:
+            entries = self._semantic.setdefault(scope, [])
+            entries.append((embedding, response))
+            del entries[:-self.max_entries]
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS improvements ("
+            "key TEXT PRIMARY KEY, scope TEXT, embedding BLOB, response TEXT)"
+        )
+        return conn
+    
+    def _load(self) -> None:
+        """Warm the in-memory tiers from the shared SQLite store"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, scope, embedding, response FROM improvements "
+                    "ORDER BY rowid DESC LIMIT ?",
+                    (self.max_entries,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not load RLAIF cache: {e}")
+            return
+        
+        for key, scope, blob, response in reversed(rows):
+            embedding = np.frombuffer(blob, dtype=np.float32) if blob else None
+            self._remember(key, scope, embedding, response)
+    
+    def _persist(
+        self,
+        key: str,
+        scope: str,
+        embedding: Optional[np.ndarray],
+        response: str
+    ) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO improvements VALUES (?, ?, ?, ?)",
+                    (key, scope, embedding.tobytes() if embedding is not None else None, response)
+                )
+        except sqlite3.Error as e:
+            print(f"Could not persist RLAIF cache entry: {e}")
+
+
+# Action logs longer than this are scored from the column store
+_VECTORIZE_MIN_ACTIONS = 64
+
+_ACTION_DTYPE = np.dtype([("status", "S16"), ("has_approval", "?"), ("ts", "i8")])
+
+
+class _ActionColumns:
+    """An agent's action log as a growable structured array of the fields the
+    reward evaluators read, filled in as actions are recorded"""
+    
+    def __init__(self, capacity: int = 64):
+        self.rows = np.empty(capacity, dtype=_ACTION_DTYPE)
+        self.size = 0
+        # Most recently appended action, to check a caller's list against
+        self.last: Optional[Dict[str, Any]] = None
+    
+    def append(self, action: Dict[str, Any]) -> None:
+        if self.size == len(self.rows):
+            grown = np.empty(2 * len(self.rows), dtype=_ACTION_DTYPE)
+            grown[:self.size] = self.rows
+            self.rows = grown
+        try:
+            ts = int(datetime.fromisoformat(action["timestamp"]).timestamp())
+        except (KeyError, TypeError, ValueError):
+            ts = 0
+        self.rows[self.size] = (
+            str(action.get("status", "")).encode()[:16],
+            "approval" in str(action).lower(),
+            ts
+        )
+        self.size += 1
+        self.last = action
+    
+    def tail(self, n: int) -> np.ndarray:
+        """View of the last ``n`` recorded actions"""
+        return self.rows[self.size - n:self.size]
+
+
 class RLAIFOptimizer:
     """Reinforcement Learning from AI Feedback optimizer"""
     
     def __init__(self):
-        self.performance_history: Dict[str, List[Dict[str, float]]] = {}
+        # Sliding window per agent so long-running deployments stay bounded
+        self.performance_history: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.improvement_cache = ImprovementCache()
+        self.embedding_batcher = EmbeddingBatcher()
+        # Per-agent action logs in column form (see record_action)
+        self._actions_np: Dict[str, _ActionColumns] = {}
+    
+    def record_action(self, agent_id: str, action: Dict[str, Any]) -> None:
+        """Append an action to the agent's column store
+        
+        Call this alongside appending to the agent's action log. Scoring a
+        long log that ends with the recorded actions then reads the columns
+        instead of walking the dicts again.
+        """
+        columns = self._actions_np.get(agent_id)
+        if columns is None:
+            columns = self._actions_np[agent_id] = _ActionColumns()
+        columns.append(action)
+    
+    def reset_actions(self, agent_id: str) -> None:
+        """Forget the agent's recorded actions, e.g. when its log is reset"""
+        self._actions_np.pop(agent_id, None)
+    
+    def _recorded_columns(
+        self,
+        agent_id: str,
+        actions: List[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        """Columns for ``actions`` if they are the tail of the recorded log"""
+        columns = self._actions_np.get(agent_id)
+        if columns is None or columns.size < len(actions) or columns.last is not actions[-1]:
+            return None
+        return columns.tail(len(actions))
     
     async def calculate_daily_rewards(
         self,
@@ -236,17 +779,23 @@ class RLAIFOptimizer:
     ) -> Dict[str, float]:
         """Calculate rewards based on agent performance"""
         
+        # Long action logs are scored from the recorded columns; short ones
+        # (and logs that weren't recorded) stay in Python
+        columns = None
+        if len(agent_actions) > _VECTORIZE_MIN_ACTIONS:
+            columns = self._recorded_columns(agent_id, agent_actions)
+        
         rewards = {
-            "task_completion": self._evaluate_task_completion(agent_actions),
+            "task_completion": self._evaluate_task_completion(agent_actions, columns),
             "user_engagement": self._evaluate_engagement(agent_actions),
             "timing_accuracy": self._evaluate_timing(agent_actions),
             "resource_efficiency": self._evaluate_efficiency(agent_actions),
-            "safety_compliance": self._evaluate_safety(agent_actions)
+            "safety_compliance": self._evaluate_safety(agent_actions, columns)
         }
         
         # Store in history
         if agent_id not in self.performance_history:
-            self.performance_history[agent_id] = []
+            self.performance_history[agent_id] = deque(maxlen=settings.RLAIF_HISTORY_LIMIT)
         self.performance_history[agent_id].append({
             "timestamp": datetime.now().isoformat(),
             "rewards": rewards
@@ -254,10 +803,16 @@ class RLAIFOptimizer:
         
         return rewards
     
-    def _evaluate_task_completion(self, actions: List[Dict[str, Any]]) -> float:
+    def _evaluate_task_completion(
+        self,
+        actions: List[Dict[str, Any]],
+        columns: Optional[np.ndarray] = None
+    ) -> float:
         """Evaluate how well tasks were completed"""
         if not actions:
             return 0.0
+        if columns is not None:
+            return float((columns["status"] == b"completed").mean())
         
         completed = sum(1 for a in actions if a.get("status") == "completed")
         return completed / len(actions)
@@ -278,11 +833,18 @@ class RLAIFOptimizer:
         # Check API calls, token usage, etc.
         return 0.8
     
-    def _evaluate_safety(self, actions: List[Dict[str, Any]]) -> float:
+    def _evaluate_safety(
+        self,
+        actions: List[Dict[str, Any]],
+        columns: Optional[np.ndarray] = None
+    ) -> float:
         """Evaluate safety and compliance"""
         # Check if approvals were requested when needed
-        approval_actions = [a for a in actions if "approval" in str(a).lower()]
-        return 1.0 if not approval_actions else 0.95
+        if columns is not None:
+            has_approval = bool(columns["has_approval"].any())
+        else:
+            has_approval = any("approval" in str(a).lower() for a in actions)
+        return 0.95 if has_approval else 1.0
     
     async def update_agent(
         self,
@@ -298,34 +860,165 @@ class RLAIFOptimizer:
             # Agent is performing well, no updates needed
             return agent
         
-        # Generate improved instructions using AI
-        improvement_prompt = f"""
-        Current agent performance metrics:
-        {json.dumps(rewards, indent=2)}
+        agent_type = agent.__class__.__name__
+        instructions = _agent_instructions(agent)
+        cache_key = ImprovementCache.exact_key(agent_type, weak_areas, instructions)
+        improved_instructions = self.improvement_cache.get(cache_key)
         
-        Weak areas that need improvement: {', '.join(weak_areas)}
-        
-        Current instructions:
-        {agent.instructions}
+        if improved_instructions is None:
+            # Generate improved instructions using AI. The rubric lives in the
+            # cached system prompt; only per-agent content goes in the user turn,
+            # with the stable instructions ahead of the changing metrics.
+            improvement_prompt = f"""
+            Current instructions:
+            {instructions}
+            
+            Current agent performance metrics:
+            {json.dumps(rewards)}
+            
+            Weak areas that need improvement: {', '.join(weak_areas)}
+            """
+            
+            # Semantic fallback: reuse a rewrite for a near-identical prompt
+            scope = f"{agent_type}:{agent.user_profile.get('id', '')}"
+            embedding = await self._embed(improvement_prompt)
+            if embedding is not None:
+                improved_instructions = self.improvement_cache.find_similar(scope, embedding)
+            
+            if improved_instructions is None:
+                response = await client.chat.completions.create(
+                    model="gpt-4.1-mini",  # Use efficient model for optimization
+                    messages=[
+                        {"role": "system", "content": OPTIMIZATION_SYSTEM_PROMPT},
+                        {"role": "user", "content": improvement_prompt}
+                    ],
+                    temperature=0.7
+                )
+                improved_instructions = response.choices[0].message.content
+                await self.improvement_cache.put(cache_key, scope, embedding, improved_instructions)
+            else:
+                # Semantic hit: remember it for exact lookups only
+                await self.improvement_cache.put(cache_key, scope, None, improved_instructions)
         
-        Generate improved instructions that address the weak areas while maintaining the agent's core responsibilities and personality. Focus on specific improvements for the weak areas.
-        """
+        # Create new agent with improved instructions (off the event loop, as
+        # constructors may load tools or prompt files)
+        improved_agent = await asyncio.to_thread(agent.__class__, agent.user_profile, agent.model)
+        _set_agent_instructions(improved_agent, improved_instructions)
+        # Preserve only the most recent history so prompts stay bounded
+        history = getattr(agent, "conversation_history", [])
+        improved_agent.conversation_history = history[-settings.MAX_CONVERSATION_HISTORY:]
         
-        response = await client.chat.completions.create(
-            model="gpt-4.1-mini",  # Use efficient model for optimization
-            messages=[
-                {"role": "system", "content": "You are an AI agent optimization expert."},
-                {"role": "user", "content": improvement_prompt}
-            ],
-            temperature=0.7
+        return improved_agent
+    
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text for the semantic cache; None if the call fails"""
+        try:
+            embedding = await self.embedding_batcher.embed(text)
+            return ImprovementCache.normalise(embedding)
+        except Exception as e:
+            print(f"Error embedding improvement prompt: {e}")
+            return None
+
+
+def _extract(response: Any) -> Tuple[str, List[Any], Optional[Dict[str, Any]]]:
+    """Return (message, tool_calls, trace_data) from a dict or object response"""
+    if isinstance(response, dict):
+        return (
+            response.get("message", ""),
+            response.get("tool_calls", []),
+            response.get("trace_data")
         )
+    return (
+        getattr(response, "message", ""),
+        getattr(response, "tool_calls", []),
+        getattr(response, "trace_data", None)
+    )
+
+
+def _agent_instructions(agent: Any) -> str:
+    """Return an agent's instructions, whether set directly or on its SDK Agent"""
+    instructions = getattr(agent, "instructions", None)
+    if instructions is None:
+        instructions = getattr(getattr(agent, "agent", None), "instructions", None)
+    return instructions or ""
+
+
+def _set_agent_instructions(agent: Any, instructions: str) -> None:
+    """Set an agent's instructions where ``_agent_instructions`` reads them"""
+    sdk_agent = getattr(agent, "agent", None)
+    if getattr(agent, "instructions", None) is None and sdk_agent is not None:
+        # Clone rather than mutate: SDK Agents may be shared between wrappers
+        agent.agent = sdk_agent.clone(instructions=instructions)
+    else:
+        agent.instructions = instructions
+
+
+def _agent_tool_names(agent: Any) -> Optional[Set[str]]:
+    """Return the names of the tools an agent's SDK Agent can call, or None
+    when the agent doesn't expose them"""
+    tools = getattr(getattr(agent, "agent", None), "tools", None)
+    if tools is None:
+        return None
+    return {getattr(tool, "name", None) for tool in tools}
+
+
+def _compile_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Precompute the matching data used when scoring a scenario (idempotent)"""
+    if "_expected_lower" not in scenario:
+        expected_lower = [o.lower() for o in scenario.get("expected_outcomes", [])]
+        scenario["_expected_lower"] = expected_lower
+        scenario["_required_tools_set"] = set(scenario.get("required_tools", []))
+        scenario["_outcome_automaton"] = None
         
-        # Create new agent with improved instructions
-        improved_agent = agent.__class__(agent.user_profile, agent.model)
-        improved_agent.instructions = response.choices[0].message.content
-        improved_agent.conversation_history = agent.conversation_history  # Preserve history
-        
-        return improved_agent
+        if ahocorasick and expected_lower:
+            # Each distinct outcome maps to (outcome, occurrences) so duplicate
+            # outcomes still count once per listing, as with substring checks
+            automaton = ahocorasick.Automaton()
+            for outcome, count in Counter(expected_lower).items():
+                automaton.add_word(outcome, (outcome, count))
+            automaton.make_automaton()
+            scenario["_outcome_automaton"] = automaton
+    return scenario
+
+
+class _ScoreWatcher:
+    """Tracks outcomes and tools seen in a streamed response
+    
+    ``observe`` is passed to ``process_message`` as ``stream_cb`` and returns
+    True once every expected outcome and required tool has been seen, i.e.
+    once the rest of the generation can no longer raise the score. Required
+    tools outside ``available_tools`` can never be called, so they are not
+    waited for.
+    """
+    
+    def __init__(self, scenario: Dict[str, Any], available_tools: Optional[Set[str]] = None):
+        self.expected = scenario["_expected_lower"]
+        self.automaton = scenario["_outcome_automaton"]
+        self.remaining_outcomes = set(self.expected)
+        self.remaining_tools = set(scenario["_required_tools_set"])
+        if available_tools is not None:
+            self.remaining_tools &= available_tools
+        # Outcomes may straddle deltas, so each scan starts this far back
+        self.overlap = max((len(o) for o in self.expected), default=1) - 1
+        self.text = ""
+        # Nothing to stop on when the score depends only on a non-empty message
+        self.enabled = bool(self.expected or self.remaining_tools)
+    
+    def observe(self, delta: str, tool_name: Optional[str] = None) -> bool:
+        if not self.enabled:
+            return False
+        if tool_name:
+            self.remaining_tools.discard(tool_name)
+        if delta and self.remaining_outcomes:
+            start = max(len(self.text) - self.overlap, 0)
+            self.text += delta.lower()
+            window = self.text[start:]
+            if self.automaton is not None:
+                for _, (outcome, _) in self.automaton.iter(window):
+                    self.remaining_outcomes.discard(outcome)
+            else:
+                self.remaining_outcomes = {o for o in self.remaining_outcomes if o not in window}
+        return not self.remaining_outcomes and not self.remaining_tools
 
 
 def load_test_scenarios(persona_type: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -370,4 +1063,4 @@ def load_test_scenarios(persona_type: Optional[str] = None) -> List[Dict[str, An
             }
         ])
     
-    return scenarios
\ No newline at end of file
+    return [_compile_scenario(scenario) for scenario in scenarios]
\ No newline at end of file
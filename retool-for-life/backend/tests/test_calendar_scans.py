@@ -0,0 +1,61 @@
+"""The vectorized calendar scans must match the plain Python path"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from mock_apis import MockCalendarAPI
+from tools import health
+
+
+def _event(event_id: str, start: str, end: str) -> dict:
+    return {"id": event_id, "title": event_id, "start": start, "end": end, "type": "meeting"}
+
+
+# Crosses midnight, spans two days, and has back-to-back pairs on both days
+# plus a pair whose times line up only when the date is ignored
+EVENTS = [
+    _event("a", "2024-03-01T09:00:00", "2024-03-01T09:30:00"),
+    _event("b", "2024-03-01T09:30:00", "2024-03-01T10:00:00"),
+    _event("c", "2024-03-01T17:00:00", "2024-03-01T18:00:00"),
+    _event("d", "2024-03-01T18:30:00", "2024-03-01T19:00:00"),
+    _event("e", "2024-03-01T23:30:00", "2024-03-02T00:30:00"),
+    _event("f", "2024-03-02T09:00:00", "2024-03-02T10:00:00"),
+    _event("g", "2024-03-02T10:00:00", "2024-03-03T11:00:00"),
+    _event("h", "2024-03-04T11:00:00", "2024-03-04T12:00:00"),
+]
+
+
+class CalendarScanParityTest(unittest.TestCase):
+    def test_schedule_density(self):
+        scalar = MockCalendarAPI.schedule_density(EVENTS)
+        vectorized = MockCalendarAPI.schedule_density(
+            EVENTS, MockCalendarAPI.event_minutes(EVENTS)
+        )
+        self.assertEqual(scalar, vectorized)
+        # 0.5 + 0.5 + 1 + 0.5 + 1 + 1 + 25 + 1
+        self.assertEqual(scalar["meeting_hours"], 30.5)
+
+    def _optimize(self, optimization_type: str, vectorize_min_events: int) -> dict:
+        with mock.patch.object(health, "_VECTORIZE_MIN_EVENTS", vectorize_min_events), \
+                mock.patch.object(MockCalendarAPI, "get_calendar_events", mock.AsyncMock(return_value=EVENTS)):
+            result = asyncio.run(health.optimize_calendar("demo", optimization_type))
+        result.pop("timestamp")
+        return result
+
+    def test_optimize_calendar(self):
+        for optimization_type in ("sleep", "breaks", "focus_time"):
+            with self.subTest(optimization_type=optimization_type):
+                self.assertEqual(
+                    self._optimize(optimization_type, len(EVENTS)),
+                    self._optimize(optimization_type, 0)
+                )
+
+    def test_back_to_back_respects_dates(self):
+        result = self._optimize("breaks", 0)
+        pairs = [o["between_events"] for o in result["optimizations"] if o["type"] == "add_buffer"]
+        self.assertEqual(pairs, [["a", "b"], ["f", "g"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
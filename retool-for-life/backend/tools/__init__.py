@@ -4,10 +4,13 @@ from .communication import (
     send_sms,
     send_whatsapp,
     approve_action,
+    approve_actions,
     get_pending_approvals,
     generate_approval_id,
     approval_queue,
-    schedule_meeting
+    ApprovalEntry,
+    schedule_meeting,
+    close_twilio_client
 )
 
 from .health import (
@@ -30,13 +33,16 @@ __all__ = [
     'send_sms',
     'send_whatsapp',
     'approve_action',
+    'approve_actions',
     'get_pending_approvals',
     'generate_approval_id',
     'approval_queue',
+    'ApprovalEntry',
     'get_health_metrics',
     'optimize_calendar',
     'get_sleep_data',
     'schedule_meeting',
+    'close_twilio_client',
     'search_wellness_products',
     'commerce_buy',
     'execute_ios_shortcut',
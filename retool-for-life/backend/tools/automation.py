@@ -1,7 +1,27 @@
 """Automation tools for iOS shortcuts and web search"""
 
 from typing import Dict, Any, Optional
-from datetime import datetime
+from functools import lru_cache
+from .clock import now_iso
+
+
+# Map of available shortcuts for the demo. Built once; action lists are
+# tuples so they can be returned in responses without copying.
+_AVAILABLE_SHORTCUTS = {
+    "lock_apps": {
+        "description": "Lock distracting apps and dim screen",
+        "actions": ("Lock Instagram", "Lock Twitter", "Lock TikTok", "Dim screen to 20%")
+    },
+    "sleep_mode": {
+        "description": "Enable full sleep mode",
+        "actions": ("Enable Do Not Disturb", "Lock all apps", "Dim screen", "Enable Night Shift")
+    },
+    "morning_routine": {
+        "description": "Morning wellness routine",
+        "actions": ("Disable Do Not Disturb", "Show weather", "Show calendar", "Play morning playlist")
+    }
+}
+_SHORTCUT_NAMES = tuple(_AVAILABLE_SHORTCUTS)
 
 
 async def execute_ios_shortcut(
@@ -10,43 +30,73 @@ async def execute_ios_shortcut(
 ) -> Dict[str, Any]:
     """Execute iOS Shortcut (computer.use simulation)"""
     
-    # Map of available shortcuts for the demo
-    available_shortcuts = {
-        "lock_apps": {
-            "description": "Lock distracting apps and dim screen",
-            "actions": ["Lock Instagram", "Lock Twitter", "Lock TikTok", "Dim screen to 20%"]
-        },
-        "sleep_mode": {
-            "description": "Enable full sleep mode",
-            "actions": ["Enable Do Not Disturb", "Lock all apps", "Dim screen", "Enable Night Shift"]
-        },
-        "morning_routine": {
-            "description": "Morning wellness routine",
-            "actions": ["Disable Do Not Disturb", "Show weather", "Show calendar", "Play morning playlist"]
-        }
-    }
-    
-    if shortcut_name not in available_shortcuts:
+    shortcut_info = _AVAILABLE_SHORTCUTS.get(shortcut_name)
+    if shortcut_info is None:
         return {
             "status": "error",
             "message": f"Shortcut '{shortcut_name}' not found",
-            "available_shortcuts": list(available_shortcuts.keys())
+            "available_shortcuts": _SHORTCUT_NAMES
         }
     
-    shortcut_info = available_shortcuts[shortcut_name]
-    
     # Simulate execution
     return {
         "status": "executed",
         "shortcut_name": shortcut_name,
         "description": shortcut_info["description"],
         "actions_performed": shortcut_info["actions"],
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "parameters": parameters or {},
         "message": f"Successfully executed iOS Shortcut: {shortcut_name}"
     }
 
 
+# Canned web search results, keyed by the keyword that selects them
+_CANNED_RESULTS = {
+    "melatonin": (
+        {
+            "title": "Nature Made Melatonin 3mg",
+            "url": "https://example.com/nature-made-melatonin",
+            "snippet": "Best overall melatonin supplement. 3mg dose optimal for most adults. USP verified for purity.",
+            "rating": 4.8,
+            "price": "$12.99",
+            "source": "HealthLine Best Melatonin 2024"
+        },
+        {
+            "title": "Natrol Melatonin Fast Dissolve",
+            "url": "https://example.com/natrol-melatonin",
+            "snippet": "Fast-acting melatonin tablets. Strawberry flavor. 5mg strength for those who need higher dose.",
+            "rating": 4.6,
+            "price": "$9.99",
+            "source": "Sleep Foundation Reviews"
+        },
+        {
+            "title": "Life Extension Melatonin IR/XR",
+            "url": "https://example.com/life-extension-melatonin",
+            "snippet": "Dual-release formula for all-night sleep support. Combines immediate and extended release.",
+            "rating": 4.7,
+            "price": "$18.99",
+            "source": "Consumer Reports"
+        }
+    )
+}
+
+_CANNED_KEYWORDS = tuple(_CANNED_RESULTS)
+
+
+@lru_cache(maxsize=256)
+def _generic_results(query: str) -> tuple:
+    """Generic wellness search results for queries without canned data"""
+    return (
+        {
+            "title": f"Best {query} for Wellness",
+            "url": f"https://example.com/{query.replace(' ', '-')}",
+            "snippet": f"Top-rated {query} products reviewed by experts.",
+            "rating": 4.5,
+            "source": "Wellness Magazine"
+        },
+    )
+
+
 async def web_search(
     query: str,
     max_results: int = 5
@@ -54,49 +104,14 @@ async def web_search(
     """Search the web for information (web.search tool)"""
     
     # Simulate web search results for wellness products
-    if "melatonin" in query.lower():
-        results = [
-            {
-                "title": "Nature Made Melatonin 3mg",
-                "url": "https://example.com/nature-made-melatonin",
-                "snippet": "Best overall melatonin supplement. 3mg dose optimal for most adults. USP verified for purity.",
-                "rating": 4.8,
-                "price": "$12.99",
-                "source": "HealthLine Best Melatonin 2024"
-            },
-            {
-                "title": "Natrol Melatonin Fast Dissolve",
-                "url": "https://example.com/natrol-melatonin",
-                "snippet": "Fast-acting melatonin tablets. Strawberry flavor. 5mg strength for those who need higher dose.",
-                "rating": 4.6,
-                "price": "$9.99",
-                "source": "Sleep Foundation Reviews"
-            },
-            {
-                "title": "Life Extension Melatonin IR/XR",
-                "url": "https://example.com/life-extension-melatonin",
-                "snippet": "Dual-release formula for all-night sleep support. Combines immediate and extended release.",
-                "rating": 4.7,
-                "price": "$18.99",
-                "source": "Consumer Reports"
-            }
-        ]
-    else:
-        # Generic wellness search results
-        results = [
-            {
-                "title": f"Best {query} for Wellness",
-                "url": f"https://example.com/{query.replace(' ', '-')}",
-                "snippet": f"Top-rated {query} products reviewed by experts.",
-                "rating": 4.5,
-                "source": "Wellness Magazine"
-            }
-        ]
+    query_folded = query.casefold()
+    keyword = next((k for k in _CANNED_KEYWORDS if k in query_folded), None)
+    results = _CANNED_RESULTS[keyword] if keyword else _generic_results(query)
     
     return {
         "query": query,
         "results": results[:max_results],
         "total_results": len(results),
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "source": "web.search API"
     }
\ No newline at end of file
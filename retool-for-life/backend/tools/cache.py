@@ -0,0 +1,132 @@
+"""Small in-process caches for tool results"""
+
+from typing import Any, Dict, Hashable, Optional
+import os
+import time
+
+# Current RSS comes from /proc on Linux, or psutil where it is installed
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Process memory budget for adaptive TTLs. Above 70% of it, cache lifetimes
+# shrink linearly until they reach zero at 90%.
+MEMORY_BUDGET_BYTES = int(os.getenv("TOOL_CACHE_MEMORY_BUDGET_MB", "512")) * 1024 * 1024
+_PRESSURE_LOW = 0.7 * MEMORY_BUDGET_BYTES
+_PRESSURE_HIGH = 0.9 * MEMORY_BUDGET_BYTES
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process right now, in bytes, if known"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+# (sampled_at, pressure) of the last reading; RSS is sampled at most once a second
+_last_pressure = (float("-inf"), 0.0)
+
+
+def memory_pressure() -> float:
+    """Return 0.0-1.0 for how close current RSS is to the cache memory budget
+    
+    Uses current rather than peak RSS, so pressure eases again once memory
+    is freed.
+    """
+    global _last_pressure
+    now = time.monotonic()
+    if now - _last_pressure[0] < 1.0:
+        return _last_pressure[1]
+    rss = _current_rss()
+    pressure = 0.0
+    if rss is not None:
+        pressure = min(max((rss - _PRESSURE_LOW) / (_PRESSURE_HIGH - _PRESSURE_LOW), 0.0), 1.0)
+    _last_pressure = (now, pressure)
+    return pressure
+
+
+class TTLCache:
+    """Time-bounded cache that evicts the least frequently used entry when full
+
+    Entries expire ``ttl`` seconds after they are stored. Cached values are
+    shared between callers and should be treated as read-only.
+
+    With ``max_ttl`` set the lifetime adapts per cache: callers report
+    upstream fetch times via ``observe_latency`` and slow upstreams earn
+    longer lifetimes (``latency_factor`` seconds of TTL per second of p95
+    latency, clamped to ``ttl``..``max_ttl``), while memory pressure
+    shortens them.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 256,
+        max_ttl: Optional[float] = None,
+        latency_factor: float = 1000.0
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.latency_factor = latency_factor
+        # Exponential moving mean and mean deviation of upstream latency
+        self._latency_mean = 0.0
+        self._latency_dev = 0.0
+        # key -> [expires_at, hits, value]
+        self._entries: Dict[Hashable, list] = {}
+
+    def observe_latency(self, seconds: float, alpha: float = 0.1) -> None:
+        """Record how long an upstream fetch for this cache took"""
+        self._latency_dev += alpha * (abs(seconds - self._latency_mean) - self._latency_dev)
+        self._latency_mean += alpha * (seconds - self._latency_mean)
+
+    def current_ttl(self) -> float:
+        """Lifetime to give an entry stored now"""
+        if self.max_ttl is None:
+            return self.ttl
+        # Roughly the 95th percentile for a normal-ish latency distribution
+        p95 = self._latency_mean + 2 * self._latency_dev
+        ttl = min(max(p95 * self.latency_factor, self.ttl), self.max_ttl)
+        return ttl * (1.0 - memory_pressure())
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss or expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        entry[1] += 1
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least used entry if the cache is full"""
+        ttl = self.current_ttl()
+        if ttl <= 0:
+            # Caching is off; leave the entries already held alone
+            return
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = [time.monotonic() + ttl, 0, value]
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[0] < now]
+        if expired:
+            for key in expired:
+                del self._entries[key]
+            return
+        least_used = min(self._entries, key=lambda key: self._entries[key][1])
+        del self._entries[least_used]
+
+    def clear(self) -> None:
+        self._entries.clear()
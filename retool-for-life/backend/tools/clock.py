@@ -0,0 +1,21 @@
+"""Shared timestamp source for tool payloads"""
+
+from datetime import datetime
+import time
+
+# Formatted timestamps are reused for this long, so handlers running in the
+# same burst share one string instead of each formatting the clock
+_REFRESH_SECONDS = 0.05
+
+_last_refresh = float("-inf")
+_last_iso = ""
+
+
+def now_iso() -> str:
+    """Return the current local time in ISO format, refreshed at most every 50ms"""
+    global _last_refresh, _last_iso
+    now = time.time()
+    if now - _last_refresh >= _REFRESH_SECONDS:
+        _last_iso = datetime.fromtimestamp(now).isoformat()
+        _last_refresh = now
+    return _last_iso
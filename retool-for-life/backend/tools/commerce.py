@@ -1,10 +1,28 @@
 """Commerce and shopping tools"""
 
 from typing import Dict, List, Any
-from datetime import datetime
-import uuid
+import re
+import time
+from functools import lru_cache
+from operator import itemgetter
 from mock_apis import MockCommerceAPI
-from .communication import generate_approval_id, approval_queue
+from .cache import TTLCache
+from .communication import ApprovalEntry, generate_approval_id, next_id_suffix, _enqueue_approval
+from .clock import now_iso
+
+# Repeat searches within a short window reuse the scored results
+_product_search_cache = TTLCache(ttl=15, max_entries=128, max_ttl=60)
+
+# Product names and descriptions come from a fixed catalog, so their
+# casefolded forms and word sets are computed once and reused
+_casefold = lru_cache(maxsize=1024)(str.casefold)
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1024)
+def _word_set(text: str) -> frozenset:
+    """Casefolded words of ``text``"""
+    return frozenset(_WORD.findall(text.casefold()))
 
 
 async def search_wellness_products(
@@ -13,22 +31,41 @@ async def search_wellness_products(
 ) -> List[Dict[str, Any]]:
     """Search for wellness products using mock API"""
     
+    query_folded = query.casefold()
+    cache_key = (query_folded, max_results)
+    cached = _product_search_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    
+    started = time.perf_counter()
     products = await MockCommerceAPI.search_wellness_products(query, max_results)
+    _product_search_cache.observe_latency(time.perf_counter() - started)
     
-    # Add recommendation scores based on query
+    # Add recommendation scores based on query. There are only three
+    # relevance levels, so bucket by score and sort each bucket by rating.
+    query_words = frozenset(_WORD.findall(query_folded))
+    high, mid, low = [], [], []
     for product in products:
         # Simple relevance scoring
-        if query.lower() in product["name"].lower():
+        if query_folded in _casefold(product["name"]):
             product["relevance_score"] = 0.9
-        elif any(word in product["description"].lower() for word in query.lower().split()):
+            high.append(product)
+        elif not query_words.isdisjoint(_word_set(product["description"])):
             product["relevance_score"] = 0.7
+            mid.append(product)
         else:
             product["relevance_score"] = 0.5
+            low.append(product)
     
-    # Sort by relevance and rating
-    products.sort(key=lambda x: (x["relevance_score"], x["rating"]), reverse=True)
+    by_rating = itemgetter("rating")
+    products = (
+        sorted(high, key=by_rating, reverse=True)
+        + sorted(mid, key=by_rating, reverse=True)
+        + sorted(low, key=by_rating, reverse=True)
+    )
     
-    return products
+    _product_search_cache.set(cache_key, products)
+    return list(products)
 
 
 async def commerce_buy(
@@ -43,15 +80,14 @@ async def commerce_buy(
     if require_approval:
         # Store in approval queue for demo
         approval_id = generate_approval_id()
-        approval_queue[approval_id] = {
-            "type": "purchase",
-            "product_id": product_id,
-            "product_name": product_name,
-            "price": price,
-            "user_id": user_id,
-            "timestamp": datetime.now().isoformat(),
-            "status": "pending"
-        }
+        await _enqueue_approval(approval_id, ApprovalEntry(
+            type="purchase",
+            product_id=product_id,
+            product_name=product_name,
+            price=price,
+            user_id=user_id,
+            timestamp=now_iso()
+        ))
         return {
             "status": "pending_approval",
             "product": product_name,
@@ -62,7 +98,7 @@ async def commerce_buy(
         }
     
     # Simulate Amazon sandbox checkout
-    order_id = f"AMZ-{uuid.uuid4().hex[:8].upper()}"
+    order_id = f"AMZ-{next_id_suffix().upper()}"
     
     return {
         "status": "completed",
@@ -72,6 +108,6 @@ async def commerce_buy(
         "price": price,
         "payment_method": "Stripe MCP Server (sandbox)",
         "delivery_date": "2-3 business days",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "message": f"Successfully purchased {product_name} via Amazon sandbox"
     }
\ No newline at end of file
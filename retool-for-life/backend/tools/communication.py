@@ -1,33 +1,298 @@
 """Communication tools for SMS and WhatsApp messaging"""
 
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Set
+import asyncio
+import itertools
+from dataclasses import dataclass, fields
 import os
+import time
 import uuid
-from twilio.rest import Client
+import json
+import httpx
+from twilio.base.exceptions import TwilioRestException
 from dotenv import load_dotenv
+from .clock import now_iso
+
+# HTTP/2 needs the h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Optional shared approval store for multi-worker deployments
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Twilio client (real integration)
+# Twilio configuration, read once at import
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_FROM = os.getenv("TWILIO_PHONE_NUMBER")
+TWILIO_WA_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+if not TWILIO_WA_FROM.startswith("whatsapp:"):
+    TWILIO_WA_FROM = f"whatsapp:{TWILIO_WA_FROM}"
+
+# Async Twilio REST client (real integration). Messages are posted directly
+# with one pooled httpx client so sends never block the event loop.
 twilio_client = None
-if os.getenv("TWILIO_ACCOUNT_SID") and os.getenv("TWILIO_AUTH_TOKEN"):
-    try:
-        twilio_client = Client(
-            os.getenv("TWILIO_ACCOUNT_SID"),
-            os.getenv("TWILIO_AUTH_TOKEN")
+if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
+    twilio_client = httpx.AsyncClient(
+        base_url="https://api.twilio.com",
+        auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=30.0
+    )
+TWILIO_MESSAGES_PATH = f"/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+
+
+async def close_twilio_client() -> None:
+    """Stop the send workers, fail any still-queued sends, and close the
+    pooled Twilio connections"""
+    global _send_queue, _send_loop
+    for worker in _send_workers:
+        worker.cancel()
+    _send_workers.clear()
+    if _send_queue is not None:
+        while not _send_queue.empty():
+            _, future = _send_queue.get_nowait()
+            _fail_send(future)
+    _send_queue = None
+    _send_loop = None
+    if twilio_client is not None:
+        await twilio_client.aclose()
+
+# Outbound send limits: Twilio queues or rejects (HTTP 429) traffic above the
+# account's messages-per-second rate, so sends are smoothed to stay under it
+TWILIO_MAX_SENDS_PER_SECOND = float(os.getenv("TWILIO_MAX_SENDS_PER_SECOND", "80"))
+TWILIO_SEND_WORKERS = 8
+TWILIO_SEND_BATCH = 10  # Messages a worker takes from the queue at once
+TWILIO_SEND_RETRIES = 3
+
+
+class _TokenBucket:
+    """Async token bucket allowing ``rate`` acquisitions per second"""
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_send_bucket = _TokenBucket(TWILIO_MAX_SENDS_PER_SECOND, TWILIO_MAX_SENDS_PER_SECOND)
+
+# Outbound messages wait in one FIFO queue drained by a fixed set of workers,
+# so bursts (e.g. bulk approvals) are spread out into a steady send rate.
+# Workers start on first use, inside the running event loop.
+_send_queue: Optional[asyncio.Queue] = None
+_send_workers: List[asyncio.Task] = []
+_send_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _queue_message(body: str, from_: Optional[str], to: str) -> Dict[str, Any]:
+    """Enqueue a message and wait for the worker that sends it"""
+    global _send_queue, _send_loop
+    loop = asyncio.get_running_loop()
+    if _send_loop is not loop:
+        _send_loop = loop
+        _send_queue = asyncio.Queue()
+        _send_workers.clear()
+        _send_workers.extend(
+            asyncio.create_task(_send_worker(_send_queue)) for _ in range(TWILIO_SEND_WORKERS)
+        )
+    future = loop.create_future()
+    await _send_queue.put(((body, from_, to), future))
+    return await future
+
+
+def _fail_send(future: asyncio.Future) -> None:
+    """Resolve a send that will never go out, so its caller doesn't hang"""
+    if not future.done():
+        future.set_exception(RuntimeError("Twilio client closed before the message was sent"))
+
+
+async def _send_worker(queue: asyncio.Queue) -> None:
+    """Take up to TWILIO_SEND_BATCH queued messages at a time and send them"""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < TWILIO_SEND_BATCH and not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        try:
+            results = await asyncio.gather(
+                *(_create_message(*args) for args, _ in batch),
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            # Shutting down mid-batch: release everyone waiting on it
+            for _, future in batch:
+                _fail_send(future)
+            raise
+        for (_, future), result in zip(batch, results):
+            queue.task_done()
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def _create_message(body: str, from_: Optional[str], to: str) -> Dict[str, Any]:
+    """Send one message through the Twilio REST API, rate limited, retrying on 429"""
+    data = {"Body": body, "To": to}
+    if from_:
+        data["From"] = from_
+    for attempt in range(TWILIO_SEND_RETRIES):
+        await _send_bucket.acquire()
+        response = await twilio_client.post(
+            TWILIO_MESSAGES_PATH,
+            data=data
         )
+        if response.status_code < 400:
+            return response.json()
+        if response.status_code != 429 or attempt == TWILIO_SEND_RETRIES - 1:
+            try:
+                error = response.json()
+            except ValueError:
+                error = {}
+            raise TwilioRestException(
+                response.status_code,
+                str(response.url),
+                msg=error.get("message", response.text),
+                code=error.get("code"),
+                method="POST"
+            )
+        await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+@dataclass(slots=True)
+class ApprovalEntry:
+    """A pending (or handled) action awaiting human approval"""
+    type: str
+    timestamp: str
+    status: str = "pending"
+    # Messaging actions
+    message: Optional[str] = None
+    to_number: Optional[str] = None
+    # Purchase actions
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    price: Optional[float] = None
+    user_id: Optional[str] = None
+    # Set once approved
+    approved_at: Optional[str] = None
+    execution_result: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the fields that are set, for JSON responses"""
+        return {
+            name: value
+            for name in _APPROVAL_FIELDS
+            if (value := getattr(self, name)) is not None
+        }
+
+
+_APPROVAL_FIELDS = tuple(field.name for field in fields(ApprovalEntry))
+
+
+# Approval queue for demo purposes. When REDIS_URL is set, approvals are
+# also stored in Redis (a hash per entry plus a sorted set of pending IDs)
+# so every worker sees them; this dict stays as the local cache and as the
+# fallback whenever Redis is unreachable.
+approval_queue: Dict[str, "ApprovalEntry"] = {}
+# Approvals whose Redis write failed, so they exist only in approval_queue
+_local_only_approvals: Set[str] = set()
+
+REDIS_URL = os.getenv("REDIS_URL")
+PENDING_APPROVALS_KEY = "pending_approvals"
+redis_client = None
+if REDIS_URL and redis_asyncio:
+    redis_client = redis_asyncio.from_url(REDIS_URL, decode_responses=True)
+
+
+def _approval_key(approval_id: str) -> str:
+    return f"approval:{approval_id}"
+
+
+async def _enqueue_approval(approval_id: str, action: ApprovalEntry) -> None:
+    """Record a pending action locally and, if configured, in Redis"""
+    approval_queue[approval_id] = action
+    if redis_client is None:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(_approval_key(approval_id), mapping={"data": json.dumps(action.to_dict())})
+            pipe.zadd(PENDING_APPROVALS_KEY, {approval_id: time.time()})
+            await pipe.execute()
+    except Exception as e:
+        _local_only_approvals.add(approval_id)
+        print(f"Warning: Could not store approval in Redis: {e}")
+
+
+async def _load_approval(approval_id: str) -> Optional[ApprovalEntry]:
+    """Find an approval locally, falling back to Redis for other workers' entries"""
+    action = approval_queue.get(approval_id)
+    if action is not None or redis_client is None:
+        return action
+    try:
+        data = await redis_client.hget(_approval_key(approval_id), "data")
+    except Exception as e:
+        print(f"Warning: Could not read approval from Redis: {e}")
+        return None
+    if data is None:
+        return None
+    action = ApprovalEntry(**json.loads(data))
+    approval_queue[approval_id] = action
+    return action
+
+
+async def _resolve_approvals(actions: Dict[str, ApprovalEntry]) -> None:
+    """Drop handled approvals from the Redis pending index in one round trip"""
+    if redis_client is None or not actions:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrem(PENDING_APPROVALS_KEY, *actions)
+            for approval_id, action in actions.items():
+                pipe.hset(_approval_key(approval_id), mapping={"data": json.dumps(action.to_dict(), default=str)})
+            await pipe.execute()
     except Exception as e:
-        print(f"Warning: Could not initialize Twilio client: {e}")
+        print(f"Warning: Could not update approvals in Redis: {e}")
 
-# Approval queue for demo purposes
-approval_queue: Dict[str, Dict[str, Any]] = {}
+
+# IDs are a random per-process prefix plus a counter: unique across
+# restarts and workers without drawing from the OS RNG on every call
+_ID_PREFIX = uuid.uuid4().hex[:6]
+_id_counter = itertools.count()
+
+
+def next_id_suffix() -> str:
+    """Return a process-unique hex suffix for approval, message and order IDs"""
+    return f"{_ID_PREFIX}{next(_id_counter):x}"
 
 
 def generate_approval_id() -> str:
     """Generate unique approval ID"""
-    return f"approval-{uuid.uuid4().hex[:8]}"
+    return f"approval-{next_id_suffix()}"
 
 
 async def send_sms(
@@ -36,55 +301,12 @@ async def send_sms(
     require_approval: bool = True
 ) -> Dict[str, Any]:
     """Send SMS message via Twilio"""
-    
-    if require_approval:
-        # Store in approval queue for demo
-        approval_id = generate_approval_id()
-        approval_queue[approval_id] = {
-            "type": "sms",
-            "message": message,
-            "to_number": to_number,
-            "timestamp": datetime.now().isoformat(),
-            "status": "pending"
-        }
-        return {
-            "status": "pending_approval",
-            "message": message,
-            "approval_id": approval_id,
-            "approval_required": True
-        }
-    
-    # Send actual SMS if Twilio is configured
-    if twilio_client:
-        try:
-            message_obj = twilio_client.messages.create(
-                body=message,
-                from_=os.getenv("TWILIO_PHONE_NUMBER"),
-                to=to_number
-            )
-            return {
-                "status": "sent",
-                "message_sid": message_obj.sid,
-                "timestamp": datetime.now().isoformat(),
-                "message": message,
-                "to_number": to_number
-            }
-        except Exception as e:
-            return {
-                "status": "failed",
-                "error": str(e),
-                "message": message
-            }
-    else:
-        # Mock response if Twilio not configured
-        return {
-            "status": "sent_mock",
-            "message_sid": f"mock-{uuid.uuid4().hex[:8]}",
-            "timestamp": datetime.now().isoformat(),
-            "message": message,
-            "to_number": to_number,
-            "note": "Twilio not configured - this is a mock response"
-        }
+    return await _send_message(
+        "sms", message, to_number, require_approval,
+        from_number=TWILIO_FROM,
+        mock_prefix="mock",
+        mock_note="Twilio not configured - this is a mock response"
+    )
 
 
 async def send_whatsapp(
@@ -98,16 +320,35 @@ async def send_whatsapp(
     if not to_number.startswith("whatsapp:"):
         to_number = f"whatsapp:{to_number}"
     
+    return await _send_message(
+        "whatsapp", message, to_number, require_approval,
+        from_number=TWILIO_WA_FROM,
+        mock_prefix="mock-wa",
+        mock_note="Twilio not configured - this is a mock WhatsApp response"
+    )
+
+
+async def _send_message(
+    message_type: str,
+    message: str,
+    to_number: str,
+    require_approval: bool,
+    from_number: Optional[str],
+    mock_prefix: str,
+    mock_note: str
+) -> Dict[str, Any]:
+    """Queue a message for approval or send it, in the shared response shape"""
+    timestamp = now_iso()
+    
     if require_approval:
         # Store in approval queue for demo
         approval_id = generate_approval_id()
-        approval_queue[approval_id] = {
-            "type": "whatsapp",
-            "message": message,
-            "to_number": to_number,
-            "timestamp": datetime.now().isoformat(),
-            "status": "pending"
-        }
+        await _enqueue_approval(approval_id, ApprovalEntry(
+            type=message_type,
+            message=message,
+            to_number=to_number,
+            timestamp=timestamp
+        ))
         return {
             "status": "pending_approval",
             "message": message,
@@ -115,81 +356,120 @@ async def send_whatsapp(
             "approval_required": True
         }
     
-    # Send actual WhatsApp message if Twilio is configured
-    if twilio_client:
-        try:
-            from_number = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
-            if not from_number.startswith("whatsapp:"):
-                from_number = f"whatsapp:{from_number}"
-                
-            message_obj = twilio_client.messages.create(
-                body=message,
-                from_=from_number,
-                to=to_number
-            )
-            return {
-                "status": "sent",
-                "message_sid": message_obj.sid,
-                "timestamp": datetime.now().isoformat(),
-                "message": message,
-                "to_number": to_number
-            }
-        except Exception as e:
-            return {
-                "status": "failed",
-                "error": str(e),
-                "message": message
-            }
-    else:
-        # Mock response if Twilio not configured
+    # Mock response if Twilio not configured
+    if not twilio_client:
         return {
             "status": "sent_mock",
-            "message_sid": f"mock-wa-{uuid.uuid4().hex[:8]}",
-            "timestamp": datetime.now().isoformat(),
+            "message_sid": f"{mock_prefix}-{next_id_suffix()}",
+            "timestamp": timestamp,
             "message": message,
             "to_number": to_number,
-            "note": "Twilio not configured - this is a mock WhatsApp response"
+            "note": mock_note
+        }
+    
+    # Send actual message
+    try:
+        message_obj = await _queue_message(
+            body=message,
+            from_=from_number,
+            to=to_number
+        )
+    except Exception as e:
+        return {
+            "status": "failed",
+            "error": str(e),
+            "message": message
         }
+    return {
+        "status": "sent",
+        "message_sid": message_obj["sid"],
+        "timestamp": now_iso(),
+        "message": message,
+        "to_number": to_number
+    }
 
 
 async def approve_action(approval_id: str) -> Dict[str, Any]:
     """Approve a pending action"""
-    if approval_id not in approval_queue:
-        return {"status": "error", "message": "Approval ID not found"}
-    
-    action = approval_queue[approval_id]
-    action["status"] = "approved"
-    action["approved_at"] = datetime.now().isoformat()
-    
-    # Execute the approved action
-    if action["type"] == "sms":
-        result = await send_sms(
-            message=action["message"],
-            to_number=action["to_number"],
-            require_approval=False
-        )
-        action["execution_result"] = result
-    elif action["type"] == "whatsapp":
-        result = await send_whatsapp(
-            message=action["message"],
-            to_number=action["to_number"],
-            require_approval=False
-        )
-        action["execution_result"] = result
+    return (await approve_actions([approval_id]))[0]
+
+
+async def approve_actions(approval_ids: List[str]) -> List[Dict[str, Any]]:
+    """Approve several pending actions, executing their sends concurrently
     
-    return {
-        "status": "approved",
-        "approval_id": approval_id,
-        "action": action
-    }
+    Results are returned in the order of ``approval_ids``.
+    """
+    actions = await asyncio.gather(*(_load_approval(aid) for aid in approval_ids))
+    
+    sends = {}
+    for approval_id, action in zip(approval_ids, actions):
+        if action is None:
+            continue
+        action.status = "approved"
+        action.approved_at = now_iso()
+        
+        # Execute the approved action
+        if action.type == "sms":
+            sends[approval_id] = send_sms(
+                message=action.message,
+                to_number=action.to_number,
+                require_approval=False
+            )
+        elif action.type == "whatsapp":
+            sends[approval_id] = send_whatsapp(
+                message=action.message,
+                to_number=action.to_number,
+                require_approval=False
+            )
+    
+    outcomes = await asyncio.gather(*sends.values(), return_exceptions=True)
+    for approval_id, outcome in zip(sends, outcomes):
+        action = approval_queue[approval_id]
+        if isinstance(outcome, Exception):
+            outcome = {"status": "failed", "error": str(outcome), "message": action.message}
+        action.execution_result = outcome
+    
+    await _resolve_approvals({
+        aid: action for aid, action in zip(approval_ids, actions) if action is not None
+    })
+    
+    return [
+        {"status": "approved", "approval_id": aid, "action": action.to_dict()}
+        if action is not None
+        else {"status": "error", "approval_id": aid, "message": "Approval ID not found"}
+        for aid, action in zip(approval_ids, actions)
+    ]
 
 
 async def get_pending_approvals() -> List[Dict[str, Any]]:
     """Get all pending approvals"""
+    if redis_client is not None:
+        try:
+            approval_ids = await redis_client.zrange(PENDING_APPROVALS_KEY, 0, -1)
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for approval_id in approval_ids:
+                    pipe.hget(_approval_key(approval_id), "data")
+                payloads = await pipe.execute()
+            pending = [
+                {"approval_id": aid, **json.loads(data)}
+                for aid, data in zip(approval_ids, payloads)
+                if data is not None
+            ]
+            # Entries Redis never received can still be approved by ID, so
+            # list them too
+            pending.extend(
+                {"approval_id": aid, **approval_queue[aid].to_dict()}
+                for aid in _local_only_approvals
+                if aid in approval_queue and approval_queue[aid].status == "pending"
+            )
+            return pending
+        except Exception as e:
+            print(f"Warning: Could not read approvals from Redis, using local queue: {e}")
+    
     return [
-        {"approval_id": aid, **action}
+        {"approval_id": aid, **action.to_dict()}
         for aid, action in approval_queue.items()
-        if action["status"] == "pending"
+        if action.status == "pending"
     ]
 
 
@@ -203,7 +483,7 @@ async def schedule_meeting(
     """Schedule a meeting (mock implementation)"""
     from mock_apis import MockCalendarAPI
     
-    meeting_id = f"meeting_{uuid.uuid4().hex[:8]}"
+    meeting_id = f"meeting_{next_id_suffix()}"
     
     meeting = {
         "id": meeting_id,
@@ -211,7 +491,7 @@ async def schedule_meeting(
         "start_time": start_time,
         "duration_minutes": duration_minutes,
         "attendees": attendees or [],
-        "created_at": datetime.now().isoformat(),
+        "created_at": now_iso(),
         "status": "scheduled"
     }
     
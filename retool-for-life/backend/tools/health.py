@@ -1,26 +1,69 @@
 """Health and wellness data tools"""
 
-from typing import Dict, List, Any
-from datetime import datetime
-import json
-import random
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
+import bisect
+import os
+import time
+import numpy as np
+import orjson
 from mock_apis import MockHealthAPI, MockCalendarAPI
+from .cache import TTLCache
+from .clock import now_iso
+
+
+# Calendars longer than this are scanned with NumPy instead of Python loops
+_VECTORIZE_MIN_EVENTS = 64
+
+# Metric name -> fetcher, in the order results are reported
+_METRIC_FETCHERS = {
+    "sleep": MockHealthAPI.get_sleep_metrics,
+    "activity": MockHealthAPI.get_activity_data,
+    "stress": MockHealthAPI.get_stress_metrics,
+    "hydration": MockHealthAPI.get_hydration_data
+}
+
+# Per (user_id, metric) results: served fresh for 10s, and the last good
+# value is kept for up to a day (bounded in size) to answer with, marked
+# stale, if the upstream fails
+_metrics_cache = TTLCache(ttl=10, max_entries=512, max_ttl=60)
+_metrics_fallback = TTLCache(ttl=24 * 60 * 60, max_entries=2048)
+
+
+SLEEP_DATA_PATH = "sleep_data.json"
+
+# (mtime, parsed contents) of the last sleep_data.json read; shared, read-only
+_sleep_data_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+def _load_sleep_data() -> Optional[Dict[str, Any]]:
+    """Return the parsed sleep data file, re-reading it only when it changes"""
+    global _sleep_data_cache
+    try:
+        mtime = os.stat(SLEEP_DATA_PATH).st_mtime
+    except FileNotFoundError:
+        _sleep_data_cache = None
+        return None
+    if _sleep_data_cache is None or _sleep_data_cache[0] != mtime:
+        with open(SLEEP_DATA_PATH, "rb") as f:
+            _sleep_data_cache = (mtime, orjson.loads(f.read()))
+    return _sleep_data_cache[1]
 
 
 async def get_sleep_data(user_id: str) -> Dict[str, Any]:
     """Get sleep data for a user"""
     try:
-        # Try to load from sleep_data.json if available
+        # Try sleep_data.json first if available
         try:
-            with open("sleep_data.json", "r") as f:
-                data = json.load(f)
-                if user_id in data:
-                    return data[user_id]
+            data = _load_sleep_data()
         except FileNotFoundError:
-            pass
+            data = None
+        if data and user_id in data:
+            return data[user_id]
         
-        # Otherwise use mock API
-        return await MockHealthAPI.get_sleep_metrics(user_id)
+        # Otherwise use mock API, through the metrics cache so this and
+        # get_health_metrics share one fetch per user
+        return await _get_metric(user_id, "sleep")
     except Exception as e:
         return {"error": str(e)}
 
@@ -31,25 +74,45 @@ async def get_health_metrics(
 ) -> Dict[str, Any]:
     """Get health metrics from mock API"""
     
-    results = {}
-    
-    if metric_type in ["sleep", "all"]:
-        results["sleep"] = await MockHealthAPI.get_sleep_metrics(user_id)
+    # Single metric: fetch it directly
+    if metric_type != "all":
+        if metric_type not in _METRIC_FETCHERS:
+            return {}
+        return await _get_metric(user_id, metric_type)
     
-    if metric_type in ["activity", "all"]:
-        results["activity"] = await MockHealthAPI.get_activity_data(user_id)
-    
-    if metric_type in ["stress", "all"]:
-        results["stress"] = await MockHealthAPI.get_stress_metrics(user_id)
-    
-    if metric_type in ["hydration", "all"]:
-        results["hydration"] = await MockHealthAPI.get_hydration_data(user_id)
+    # All metrics: the sub-fetches are independent, so overlap them. Each is
+    # cached on its own, so later single-metric calls hit the cache too.
+    # A failing metric is reported on its own rather than sinking the batch.
+    values = await asyncio.gather(
+        *(_get_metric(user_id, metric) for metric in _METRIC_FETCHERS),
+        return_exceptions=True
+    )
+    return {
+        metric: {"error": str(value)} if isinstance(value, Exception) else value
+        for metric, value in zip(_METRIC_FETCHERS, values)
+    }
+
+
+async def _get_metric(user_id: str, metric: str) -> Dict[str, Any]:
+    """Fetch one metric through the cache, falling back to stale data on error"""
+    key = (user_id, metric)
+    cached = _metrics_cache.get(key)
+    if cached is not None:
+        return cached
     
-    # If single metric requested, return just that
-    if metric_type != "all" and metric_type in results:
-        return results[metric_type]
+    started = time.perf_counter()
+    try:
+        value = await _METRIC_FETCHERS[metric](user_id)
+    except Exception:
+        stale = _metrics_fallback.get(key)
+        if stale is None:
+            raise
+        return {**stale, "stale": True}
     
-    return results
+    _metrics_cache.observe_latency(time.perf_counter() - started)
+    _metrics_cache.set(key, value)
+    _metrics_fallback.set(key, value)
+    return value
 
 
 async def optimize_calendar(
@@ -58,18 +121,34 @@ async def optimize_calendar(
 ) -> Dict[str, Any]:
     """Analyze and optimize calendar for wellness"""
     
-    # Get calendar events
+    # Get calendar events (the API returns them sorted by start time)
     events = await MockCalendarAPI.get_calendar_events(user_id)
     
-    # Analyze schedule density
-    analysis = await MockCalendarAPI.analyze_schedule_density(events)
+    # Large calendars get their times packed into minute arrays once, so the
+    # density, late-meeting and back-to-back checks below run vectorized
+    minutes = None
+    if len(events) > _VECTORIZE_MIN_EVENTS:
+        minutes = MockCalendarAPI.event_minutes(events)
+    
+    # Only the focus_time suggestions read the schedule density, so the other
+    # types skip the analysis (and leave it out of the result)
+    analysis = None
+    if optimization_type == "focus_time":
+        analysis = MockCalendarAPI.schedule_density(events, minutes)
     
     # Generate specific optimizations based on type
     optimizations = []
     
     if optimization_type == "sleep":
-        # Check for late meetings
-        late_meetings = [e for e in events if e["start"].split("T")[1] >= "18:00"]
+        # Check for late meetings. Events are sorted, so everything from the
+        # first start at or after 18:00 on the calendar's first day is late
+        if minutes is not None:
+            first_late = int(np.searchsorted(minutes[0], 18 * 60))
+        else:
+            # ISO "YYYY-MM-DDTHH:MM" prefixes sort like the datetimes they name
+            starts = [e["start"][:16] for e in events]
+            first_late = bisect.bisect_left(starts, f"{events[0]['start'][:10]}T18:00") if events else 0
+        late_meetings = events[first_late:]
         if late_meetings:
             optimizations.append({
                 "type": "reschedule",
@@ -87,14 +166,25 @@ async def optimize_calendar(
     
     elif optimization_type == "breaks":
         # Find back-to-back meetings
-        for i in range(len(events) - 1):
-            if events[i]["end"] == events[i + 1]["start"]:
-                optimizations.append({
-                    "type": "add_buffer",
-                    "description": f"Add 15-minute break between '{events[i]['title']}' and '{events[i + 1]['title']}'",
-                    "impact": "medium",
-                    "between_events": [events[i]["id"], events[i + 1]["id"]]
-                })
+        if minutes is not None:
+            starts, ends = minutes
+            back_to_back = (
+                (events[i], events[i + 1])
+                for i in np.flatnonzero(ends[:-1] == starts[1:])
+            )
+        else:
+            back_to_back = (
+                (current, following)
+                for current, following in zip(events, events[1:])
+                if current["end"] == following["start"]
+            )
+        for current, following in back_to_back:
+            optimizations.append({
+                "type": "add_buffer",
+                "description": f"Add 15-minute break between '{current['title']}' and '{following['title']}'",
+                "impact": "medium",
+                "between_events": [current["id"], following["id"]]
+            })
         
         optimizations.append({
             "type": "block_time",
@@ -120,10 +210,12 @@ async def optimize_calendar(
                 "current_load": f"{analysis['meeting_hours']} hours of meetings"
             })
     
-    return {
+    result = {
         "current_schedule": events,
-        "analysis": analysis,
         "optimizations": optimizations,
         "optimization_type": optimization_type,
-        "timestamp": datetime.now().isoformat()
-    }
\ No newline at end of file
+        "timestamp": now_iso()
+    }
+    if analysis is not None:
+        result["analysis"] = analysis
+    return result
\ No newline at end of file